@@ -0,0 +1,402 @@
+# Orca_test
+# Copyright (c) 2016 UrbanSim Inc.
+# See full license in LICENSE
+
+"""
+Asserts specs that are too big for one process by splitting them into work units and
+sending the units to worker processes, which stand in for the nodes of a sharded run.
+Started with 'orca-test validate --workers N', or with validate_sharded().
+
+Each table in a spec is a work unit, with all of that table's characteristics, so a
+table is generated by one worker, which releases it from orca's cache as soon as the
+unit is done. The units are sent to the workers through a task queue as they become
+free. Column characteristics that can be checked a block of rows at a time (see
+ROW_SHARDABLE) can instead be split into row-range units, so that several workers share
+a large column. A row range fails if the same assertion fails for those rows alone; for
+the portion of missing values, the workers return counts instead, which are added up
+before the limit is asserted.
+
+Row ranges split the work of checking a column, not of producing it: every worker that
+gets a range of a column still generates the whole table and column, and holds them in
+memory while the unit runs. Splitting a column into row ranges saves time only when the
+checks cost more than generating the column.
+
+Each worker imports the modules that register the orca model itself. Units are plain
+Python objects sent through multiprocessing queues, and results come back in the format
+returned by server.validate_specs().
+
+"""
+
+import multiprocessing
+from queue import Empty
+
+import numpy as np
+
+from .orca_test import (ColumnSpec, OrcaAssertionError, OrcaSpec, QUALIFIERS,
+                        SessionTableCache, assert_column_spec, assert_portion_missing,
+                        get_column_or_index, get_spec_columns, missing_values_mask,
+                        split_spec)
+from .server import load_models
+
+
+# Column characteristics that hold for a whole column if they hold for every row range
+ROW_SHARDABLE = ['missing_val_coding', 'max', 'min', 'values_in', 'foreign_key', 'pattern',
+                 'min_length', 'max_length', 'prefix_in', 'case', 'max_portion_missing',
+                 'missing']
+
+# Column characteristics that compare a column with a summary kept from the previous
+# iteration, which a worker process started for one validation doesn't have
+CHANGE_CHARACTERISTICS = ['max_change_sum', 'max_change_mean', 'max_portion_changed',
+                          'only_grows']
+
+
+def get_characteristic(c_spec):
+    """
+    Helper function. Returns the name of the characteristic asserted by a ColumnSpec
+    from split_spec(), which also has that characteristic's qualifiers.
+
+    """
+    keys = [k for k in c_spec.properties if k not in QUALIFIERS]
+    if len(keys) == 0:
+        keys = list(c_spec.properties.keys())
+    return keys[0]
+
+
+def plan_units(specs, row_shards=None, tables=None):
+    """
+    Split a list of specs into work units, one for each table in each spec and one for
+    each spec's injectables, plus row-range units for columns that are split into rows.
+
+    Parameters
+    ----------
+    specs : list of orca_test.OrcaSpec
+    row_shards : int or dict, optional
+        Number of row ranges to split a table's column characteristics into, if they're
+        in ROW_SHARDABLE, or a dict with the number for each table. Characteristics of
+        tables loaded from Parquet files are not split, because they can be asserted
+        from the files' statistics. Every worker asserting a row range still generates
+        the whole column.
+    tables : list of str, optional
+        Only assert characteristics of these tables (injectables are skipped).
+
+    Returns
+    -------
+    units : list of dicts
+        Each unit has the 'spec' and 'table' it refers to (None for injectables), the
+        'parts' it asserts, as tuples of their position in the spec, their item name,
+        and the function from split_spec(), the tables that it 'uses', and a 'shard'
+        tuple with the position of its row range and the number of ranges, or None.
+
+    Raises
+    ------
+    ValueError
+        If a spec has characteristics in CHANGE_CHARACTERISTICS, which would always
+        pass in new worker processes.
+
+    """
+    units = []
+    position = 0
+    for o_spec in specs:
+        groups = {}
+        order = []
+        for name, table_name, func in split_spec(o_spec):
+            if (func.func is assert_column_spec) and \
+                    (get_characteristic(func.args[1]) in CHANGE_CHARACTERISTICS):
+                msg = "Characteristic '%s' compares iterations of a model, and can't be " \
+                      "asserted by worker processes" % name
+                raise ValueError(msg)
+
+            if table_name not in groups:
+                groups[table_name] = []
+                order.append(table_name)
+            groups[table_name].append((position, name, func))
+            position += 1
+
+        for table_name in order:
+            if (tables is not None) and (table_name not in tables):
+                continue
+
+            uses = set()
+            if table_name is not None:
+                t_specs = [t for t in o_spec.tables if t.name == table_name]
+                uses = set(get_spec_columns(OrcaSpec('', *t_specs)).keys())
+
+            shards = row_shards
+            if isinstance(row_shards, dict):
+                shards = row_shards.get(table_name)
+            if shards is None:
+                shards = 1
+
+            whole = []
+            sharded = []
+            for part in groups[table_name]:
+                func = part[2]
+                shardable = (func.func is assert_column_spec) and \
+                            (func.keywords.get('parquet') is None) and \
+                            (get_characteristic(func.args[1]) in ROW_SHARDABLE)
+                if shardable and (shards > 1):
+                    sharded.append(part)
+                else:
+                    whole.append(part)
+
+            if len(whole) > 0:
+                units.append({'spec': o_spec.name, 'table': table_name, 'parts': whole,
+                              'uses': uses, 'shard': None})
+            for i in range(shards if len(sharded) > 0 else 0):
+                units.append({'spec': o_spec.name, 'table': table_name, 'parts': sharded,
+                              'uses': uses, 'shard': (i, shards)})
+    return units
+
+
+def run_part(func, shard=None):
+    """
+    Assert one characteristic from a work unit, for a row range if there is one.
+
+    Parameters
+    ----------
+    func : functools.partial
+        Function from split_spec().
+    shard : tuple, optional
+        Position of the row range and the number of ranges.
+
+    Returns
+    -------
+    result : dict
+        For row ranges, the 'rows' that were asserted, and for the portion of missing
+        values, the number that are 'missing'. Failed assertions are recorded as a
+        'message', which gives row positions in the whole column.
+
+    """
+    result = {'message': None}
+    if shard is None:
+        try:
+            func()
+        except OrcaAssertionError as e:
+            result['message'] = str(e)
+        return result
+
+    table_name, c_spec = func.args
+    try:
+        # The whole column is generated, and only the checks are limited to the rows
+        ds = get_column_or_index(table_name, c_spec.name)
+    except OrcaAssertionError as e:
+        result['message'] = str(e)
+        return result
+
+    i, shards = shard
+    rows = (len(ds) * i // shards, len(ds) * (i + 1) // shards)
+    result['rows'] = rows
+
+    # Assert everything but a count of missing values on the rows alone
+    k = get_characteristic(c_spec)
+    props = c_spec.properties.copy()
+    coding = func.keywords.get('missing_val_coding',
+                               props.get('missing_val_coding', np.nan))
+    if k in ['max_portion_missing', 'missing']:
+        del props[k]
+        block = ds.iloc[rows[0]:rows[1]]
+        result['missing'] = int(missing_values_mask(block, coding).sum())
+
+    try:
+        if len(props) > 0:
+            assert_column_spec(table_name, ColumnSpec(c_spec.name, **props),
+                               missing_val_coding=coding, rows=rows)
+    except OrcaAssertionError as e:
+        result['message'] = str(e)
+    return result
+
+
+def run_unit(unit, table_cache=None):
+    """
+    Assert a work unit in the current process. The tables it uses are cached while its
+    characteristics are asserted, and released from the cache when it's done.
+
+    Parameters
+    ----------
+    unit : dict
+        Work unit from plan_units().
+    table_cache : orca_test.SessionTableCache, optional
+
+    Returns
+    -------
+    results : list of dicts
+        Result of run_part() for each of the unit's parts, in order. Errors other than
+        failed assertions are recorded as a 'message' for the part that raised them.
+
+    """
+    if table_cache is None:
+        table_cache = SessionTableCache()
+
+    results = []
+    try:
+        for t in unit['uses']:
+            table_cache.enable(t)
+        for position, name, func in unit['parts']:
+            try:
+                results.append(run_part(func, unit['shard']))
+            except Exception as e:
+                results.append({'message': '%s: %s' % (type(e).__name__, str(e))})
+    finally:
+        for t in unit['uses']:
+            table_cache.release(t)
+    return results
+
+
+def run_worker(models, tasks, results):
+    """
+    Worker process. Imports the modules that register an orca model, then asserts work
+    units from a queue until it gets None, putting each unit's position and results on
+    another queue. If the model can't be loaded, the error is put on the results queue
+    with a position of None.
+
+    Parameters
+    ----------
+    models : list of str
+        Module names or paths to Python files, imported in order.
+    tasks : multiprocessing.Queue
+    results : multiprocessing.Queue
+
+    Returns
+    -------
+    None
+
+    """
+    try:
+        load_models(models)
+    except Exception as e:
+        results.put((None, {'error': '%s: %s' % (type(e).__name__, str(e))}))
+        return
+
+    table_cache = SessionTableCache()
+    while True:
+        task = tasks.get()
+        if task is None:
+            break
+
+        position, unit = task
+        results.put((position, run_unit(unit, table_cache)))
+
+
+def merge_results(units, unit_results):
+    """
+    Merge the results of work units into one result per characteristic, in the order
+    that the characteristics appear in the specs. Row ranges fail with the first failing
+    range, and counts of missing values are added up and asserted with the same limits
+    as assert_column_max_portion_missing().
+
+    Parameters
+    ----------
+    units : list of dicts
+        Work units from plan_units().
+    unit_results : list of lists
+        Results from run_unit(), in the same order.
+
+    Returns
+    -------
+    results : dict
+        In the format returned by server.validate_specs().
+
+    """
+    merged = {}
+    totals = {}
+    for unit, part_results in zip(units, unit_results):
+        for (position, name, func), part_result in zip(unit['parts'], part_results):
+            if position not in merged:
+                merged[position] = {'spec': unit['spec'], 'name': name,
+                                    'table': unit['table'], 'passed': True,
+                                    'message': None}
+            result = merged[position]
+
+            if (part_result['message'] is not None) and result['passed']:
+                result.update(passed=False, message=part_result['message'])
+
+            if 'missing' in part_result:
+                total = totals.setdefault(position, {'func': func, 'missing': 0, 'rows': 0})
+                total['missing'] += part_result['missing']
+                total['rows'] += part_result['rows'][1] - part_result['rows'][0]
+
+    # Assert the counts of missing values once every row range is added up
+    for position, total in totals.items():
+        result = merged[position]
+        if not result['passed']:
+            continue
+        c_spec = total['func'].args[1]
+        k = get_characteristic(c_spec)
+        v = c_spec.properties[k]
+        if k == 'missing':
+            portion = 1 if v else 0
+        else:
+            portion = v
+        try:
+            assert_portion_missing(c_spec.name, total['missing'], total['rows'], portion)
+        except OrcaAssertionError as e:
+            result.update(passed=False, message=str(e))
+
+    results = [merged[position] for position in sorted(merged)]
+    return {'passed': all(r['passed'] for r in results), 'results': results}
+
+
+def validate_sharded(specs, models, workers=2, row_shards=None, tables=None):
+    """
+    Assert a list of specs with worker processes, recording the results instead of
+    raising an OrcaAssertionError. Workers are started with the 'spawn' method, so they
+    share nothing with this process or each other, like separate nodes.
+
+    Parameters
+    ----------
+    specs : list of orca_test.OrcaSpec
+    models : list of str
+        Module names or paths to Python files that each worker imports, in order, to
+        register the orca model.
+    workers : int, optional
+        Number of worker processes.
+    row_shards : int or dict, optional
+        Number of row ranges to split column characteristics into (see plan_units()).
+    tables : list of str, optional
+        Only assert characteristics of these tables (injectables are skipped).
+
+    Returns
+    -------
+    results : dict
+        In the format returned by server.validate_specs().
+
+    """
+    units = plan_units(specs, row_shards, tables)
+
+    context = multiprocessing.get_context('spawn')
+    tasks = context.Queue()
+    results = context.Queue()
+
+    processes = [context.Process(target=run_worker, args=(models, tasks, results))
+                 for i in range(workers)]
+    for p in processes:
+        p.start()
+
+    unit_results = [None] * len(units)
+    pending = len(units)
+    try:
+        for position, unit in enumerate(units):
+            tasks.put((position, unit))
+        for p in processes:
+            tasks.put(None)
+
+        while pending > 0:
+            try:
+                position, result = results.get(timeout=1)
+            except Empty:
+                if not any(p.is_alive() for p in processes):
+                    raise RuntimeError("Workers exited before asserting every unit")
+                continue
+
+            if position is None:
+                raise RuntimeError("Worker could not load the model: %s" % result['error'])
+            unit_results[position] = result
+            pending -= 1
+
+    finally:
+        for p in processes:
+            if pending > 0:
+                p.terminate()
+            p.join()
+
+    return merge_results(units, unit_results)
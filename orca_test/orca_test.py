@@ -2,11 +2,43 @@
 # Copyright (c) 2016 UrbanSim Inc.
 # See full license in LICENSE
 
+import functools
+import json
+import os
+import pickle
+import time
+import tracemalloc
+import warnings
+
 import numpy as np
 import pandas as pd
 
 import orca
 
+try:
+    import pyarrow as pa
+    import pyarrow.compute as pc
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = None
+
+# Number of entries per block when scanning columns for the first violation of an
+# assertion (see find_first())
+CHUNK_SIZE = 1000000
+
+# Column characteristics that are asserted together, from one conversion of the column
+STRING_CHARACTERISTICS = ['pattern', 'min_length', 'max_length', 'prefix_in', 'case']
+
+# Column characteristics that can be asserted from a Parquet file's statistics
+PARQUET_CHARACTERISTICS = ['missing_val_coding', 'missing', 'max', 'min',
+                           'max_portion_missing']
+
+# Column characteristics whose assertions use a mask of the column's missing values
+MASK_CHARACTERISTICS = ['missing_val_coding', 'missing', 'max', 'min',
+                        'max_portion_missing', 'values_in', 'foreign_key', 'group_by',
+                        'max_change_sum', 'max_change_mean', 'only_grows'] + \
+                       STRING_CHARACTERISTICS
+
 
 """
 ######################
@@ -72,7 +104,7 @@ def spec_from_yaml(string):
     return
 
 
-def assert_orca_spec(o_spec):
+def assert_orca_spec(o_spec, snapshot=None, schedule=False, max_memory=None):
     """
     Assert a set of orca data specifications.
     
@@ -80,12 +112,31 @@ def assert_orca_spec(o_spec):
     ----------
     o_spec : orca_test.OrcaSpec
         Orca data specifications
+    snapshot : str, optional
+        Directory written by write_spec_snapshot(). If provided, the snapshot's tables
+        and injectables are registered with orca first (see load_spec_snapshot()), so
+        that the spec is asserted without re-running the original orca functions.
+    schedule : bool, optional
+        Whether to assert the characteristics in the order given by schedule_spec(),
+        generating each table once and clearing it from the cache after its last use.
+    max_memory : int or str, optional
+        Memory budget for generated tables, in bytes or as a str like '16GB'. Implies
+        schedule=True. When the tables held in memory exceed the budget, any that are
+        not needed by the next table's characteristics are cleared, even if later
+        characteristics need them again.
     
     Returns
     -------
     None
     
     """
+    if snapshot is not None:
+        load_spec_snapshot(snapshot)
+
+    if schedule or (max_memory is not None):
+        assert_scheduled_spec(o_spec, max_memory)
+        return
+
     # Assert the properties of each table and injectable
     for t_spec in o_spec.tables:
         assert_table_spec(t_spec)
@@ -121,15 +172,27 @@ def assert_table_spec(t_spec):
         
         if (k, v) == ('can_be_generated', True):
             assert_table_can_be_generated(t_spec.name)
+        
+        if k == 'max_memory_mb':
+            assert_table_max_memory(t_spec.name, v, t_spec.properties.get('memory_deep', False))
+        
+        if k == 'max_bytes_per_row':
+            assert_table_max_bytes_per_row(t_spec.name, v, 
+                                           t_spec.properties.get('memory_deep', False))
+        
+        if k in ['max_generation_seconds', 'max_generation_peak_mb']:
+            assert_table_can_be_generated(t_spec.name, 
+                                          **generation_budget(t_spec.properties, k))
     
     # Assert the properties of each column
     for c in t_spec.columns:
-        assert_column_spec(t_spec.name, c)
+        assert_column_spec(t_spec.name, c, parquet=t_spec.properties.get('parquet'))
         
     return
 
 
-def assert_column_spec(table_name, c_spec):
+def assert_column_spec(table_name, c_spec, parquet=None, missing_val_coding=np.nan,
+                       rows=None):
     """
     Assert the properties specified for a column.
     
@@ -139,60 +202,135 @@ def assert_column_spec(table_name, c_spec):
         Name of the orca table containing the column
     c_spec : orca_test.ColumnSpec
         Column specifications
+    parquet : str, optional
+        Path to a Parquet file that the orca table is loaded from. If provided, the
+        'missing_val_coding', 'missing', 'max_portion_missing', 'max', and 'min'
+        characteristics are asserted from the file's row group statistics where
+        possible, without generating the table.
+    missing_val_coding : {np.nan, int, str, set}, optional
+        Value that indicates missing entries, for specs that don't assert a
+        'missing_val_coding' themselves (for example, the parts from split_spec()).
+    rows : tuple of int, optional
+        Positions of the first row and the row after the last, to assert the
+        'missing_val_coding', 'max', 'min', 'values_in', 'foreign_key', and string
+        characteristics for a range of rows only (see orca_test.coordinator). Other
+        characteristics are asserted for the whole column.
     
     Returns
     -------
     None
     
     """
-    # The missing-value coding affects other assertions, so check for this first
-    missing_val_coding = np.nan
-    for k, v in c_spec.properties.items():
+    # If several assertions about the column use its missing values, they share one mask
+    # (see get_missing_mask()), and otherwise masks are built a block at a time
+    global _shared_masks
+    _shared_masks = {} if count_mask_characteristics(c_spec, parquet) > 1 else None
+    try:
+        # The missing-value coding affects other assertions, so check for this first
+        for k, v in c_spec.properties.items():
         
-        if k == 'missing_val_coding':
-            missing_val_coding = v
-            assert_column_missing_value_coding(table_name, c_spec.name, missing_val_coding)
-
-    # Translate the column's properties into assertion statements
-    for k, v in c_spec.properties.items():
-    
-        if (k, v) == ('registered', True):
-            assert_column_is_registered(table_name, c_spec.name)
-
-        if (k, v) == ('registered', False):
-            assert_column_not_registered(table_name, c_spec.name)
-
-        if (k, v) == ('can_be_generated', True):
-            assert_column_can_be_generated(table_name, c_spec.name)
-
-        if (k, v) == ('primary_key', True):
-            assert_column_is_primary_key(table_name, c_spec.name)
-
-        if k == 'foreign_key':
-            # The value should be a str with format 'parent_table_name.parent_column_name'
-            tab, col = v.split('.')
-            assert_column_is_foreign_key(table_name, c_spec.name, tab, col, missing_val_coding)
+            if k == 'missing_val_coding':
+                missing_val_coding = v
+                if parquet is not None:
+                    assert_parquet_column_missing_value_coding(parquet, c_spec.name,
+                                                               missing_val_coding)
+                else:
+                    assert_column_missing_value_coding(table_name, c_spec.name,
+                                                       missing_val_coding, rows)
+
+        # Translate the column's properties into assertion statements
+        for k, v in c_spec.properties.items():
+    
+            if (k, v) == ('registered', True):
+                assert_column_is_registered(table_name, c_spec.name)
+
+            if (k, v) == ('registered', False):
+                assert_column_not_registered(table_name, c_spec.name)
+
+            if (k, v) == ('can_be_generated', True):
+                assert_column_can_be_generated(table_name, c_spec.name)
+
+            if k in ['max_generation_seconds', 'max_generation_peak_mb']:
+                assert_column_can_be_generated(table_name, c_spec.name,
+                                               **generation_budget(c_spec.properties, k))
+
+            if (k, v) == ('primary_key', True):
+                assert_column_is_primary_key(table_name, c_spec.name)
+
+            if k == 'foreign_key':
+                tab, col = split_column_reference(k, v)
+                assert_column_is_foreign_key(table_name, c_spec.name, tab, col,
+                                             missing_val_coding, rows)
        
-        if (k, v) == ('numeric', True):
-            assert_column_is_numeric(table_name, c_spec.name)
+            if (k, v) == ('numeric', True):
+                assert_column_is_numeric(table_name, c_spec.name)
             
-        if (k, v) == ('missing', False):
-            assert_column_no_missing_values(table_name, c_spec.name, missing_val_coding)
-
-        if k == 'max':
-            assert_column_max(table_name, c_spec.name, v, missing_val_coding)
+            if (k, v) == ('missing', False):
+                if parquet is not None:
+                    assert_parquet_column_max_portion_missing(parquet, c_spec.name, 0,
+                                                              missing_val_coding)
+                else:
+                    assert_column_no_missing_values(table_name, c_spec.name, missing_val_coding)
+
+            if k == 'max':
+                if parquet is not None:
+                    assert_parquet_column_max(parquet, c_spec.name, v, missing_val_coding)
+                else:
+                    assert_column_max(table_name, c_spec.name, v, missing_val_coding, rows)
        
-        if k == 'min':
-            assert_column_min(table_name, c_spec.name, v, missing_val_coding)
+            if k == 'min':
+                if parquet is not None:
+                    assert_parquet_column_min(parquet, c_spec.name, v, missing_val_coding)
+                else:
+                    assert_column_min(table_name, c_spec.name, v, missing_val_coding, rows)
        
-        if k == 'max_portion_missing':
-            assert_column_max_portion_missing(table_name, c_spec.name, v, missing_val_coding)
-
-        if k == 'values_in':
-            assert_column_values_in(table_name, c_spec.name, v, missing_val_coding)
-
-        if (k, v) == ('is_unique', True):
-            assert_column_is_unique(table_name, c_spec.name)
+            if k == 'max_portion_missing':
+                if parquet is not None:
+                    assert_parquet_column_max_portion_missing(parquet, c_spec.name, v,
+                                                              missing_val_coding)
+                else:
+                    assert_column_max_portion_missing(table_name, c_spec.name, v,
+                                                      missing_val_coding)
+
+            if k == 'values_in':
+                assert_column_values_in(table_name, c_spec.name, v, missing_val_coding, rows)
+
+            if (k, v) == ('is_unique', True):
+                assert_column_is_unique(table_name, c_spec.name)
+
+            if k == 'dtype_not_wider_than':
+                assert_column_dtype_not_wider_than(table_name, c_spec.name, v)
+
+            if k == 'max_change_sum':
+                assert_column_max_change(table_name, c_spec.name, 'sum', v, missing_val_coding)
+
+            if k == 'max_change_mean':
+                assert_column_max_change(table_name, c_spec.name, 'mean', v, missing_val_coding)
+
+            if k == 'max_portion_changed':
+                assert_column_max_portion_changed(table_name, c_spec.name, v)
+
+            if (k, v) == ('only_grows', True):
+                assert_column_only_grows(table_name, c_spec.name, missing_val_coding)
+
+            if k == 'group_by':
+                tab, col = split_column_reference(k, v)
+                assert_column_group_aggregate(table_name, c_spec.name, tab, col,
+                        agg=c_spec.properties.get('group_agg', 'sum'),
+                        maximum=c_spec.properties.get('group_max'),
+                        minimum=c_spec.properties.get('group_min'),
+                        key_column_name=c_spec.properties.get('group_key'),
+                        missing_val_coding=missing_val_coding)
+
+        # String characteristics share a single conversion of the column, so assert together
+        string_props = dict((k, v) for k, v in c_spec.properties.items()
+                            if k in STRING_CHARACTERISTICS)
+        if len(string_props) > 0:
+            assert_column_strings(table_name, c_spec.name, 
+                                  missing_val_coding=missing_val_coding, rows=rows,
+                                  **string_props)
+    finally:
+        _shared_masks = None
 
     return
 
@@ -212,6 +350,10 @@ def assert_injectable_spec(i_spec):
         if (k, v) == ('can_be_generated', True):
             assert_injectable_can_be_generated(i_spec.name)
 
+        if k in ['max_generation_seconds', 'max_generation_peak_mb']:
+            assert_injectable_can_be_generated(i_spec.name,
+                                               **generation_budget(i_spec.properties, k))
+
         if (k, v) == ('numeric', True):
             assert_injectable_is_numeric(i_spec.name)
 
@@ -227,6 +369,343 @@ def assert_injectable_spec(i_spec):
     return
 
 
+def split_column_reference(characteristic, value):
+    """
+    Helper function. Splits the value of a characteristic that names a column of another
+    table, such as 'foreign_key' or 'group_by', into the table and column names.
+    
+    Parameters
+    ----------
+    characteristic : str
+    value : str
+        In the format 'table_name.column_name'.
+    
+    Returns
+    -------
+    table_name, column_name : str
+    
+    """
+    parts = value.split('.') if isinstance(value, str) else []
+    if (len(parts) != 2) or ('' in parts):
+        msg = "Characteristic '%s' should have the format 'table_name.column_name', " \
+              "not '%s'" % (characteristic, str(value))
+        raise OrcaAssertionError(msg)
+    return parts[0], parts[1]
+
+
+# Characteristics that qualify others, and so are passed along with them instead of being
+# asserted on their own. None means that a qualifier applies to every characteristic.
+QUALIFIERS = {
+    'missing_val_coding': None,
+    'group_agg': ['group_by'],
+    'group_max': ['group_by'],
+    'group_min': ['group_by'],
+    'group_key': ['group_by'],
+    'memory_deep': ['max_memory_mb', 'max_bytes_per_row'],
+    'generation_repeat': ['max_generation_seconds', 'max_generation_peak_mb'],
+    'generation_warmup': ['max_generation_seconds', 'max_generation_peak_mb'],
+}
+
+
+def split_properties(properties):
+    """
+    Split a spec object's characteristics into groups that can be asserted separately,
+    each one with its qualifiers.
+
+    Parameters
+    ----------
+    properties : dict
+
+    Returns
+    -------
+    parts : list of tuples
+        Each tuple has the name of a characteristic and a dict of the properties needed
+        to assert it.
+
+    """
+    parts = []
+    for k, v in properties.items():
+        parents = QUALIFIERS.get(k)
+        if (parents is not None) and any(p in properties for p in parents):
+            continue
+
+        part_props = {k: v}
+        for q, parents in QUALIFIERS.items():
+            if (q in properties) and ((parents is None) or (k in parents)):
+                part_props[q] = properties[q]
+        parts.append((k, part_props))
+    return parts
+
+
+class SessionTableCache(object):
+    """
+    Turns on orca caching for tables registered as functions, and for their function
+    columns, so that they are only generated once while specs are asserted repeatedly
+    (for example, in a pytest session). release() turns caching back off for one table
+    and clears its cached data, and restore() does this for all of them. Cached data is
+    cleared even for tables and columns that orca was already caching, which are
+    generated again if they're used after being released.
+
+    """
+    def __init__(self):
+        self.wrappers = {}
+
+    def enable(self, table_name):
+        if (table_name in self.wrappers) or not orca.is_table(table_name):
+            return
+
+        wrappers = []
+        if orca.table_type(table_name) == 'function':
+            wrappers.append(orca.get_raw_table(table_name))
+        for column_name in orca.list_columns_for_table(table_name):
+            wrappers.append(orca.get_raw_column(table_name, column_name))
+
+        # Series columns have no 'cache' attribute
+        self.wrappers[table_name] = [w for w in wrappers
+                                     if getattr(w, 'cache', True) is False]
+        for w in self.wrappers[table_name]:
+            w.cache = True
+
+    def release(self, table_name):
+        if table_name not in self.wrappers:
+            return
+
+        for w in self.wrappers.pop(table_name):
+            w.cache = False
+        if orca.is_table(table_name):
+            orca.get_raw_table(table_name).clear_cached()
+
+    def restore(self):
+        for table_name in list(self.wrappers.keys()):
+            self.release(table_name)
+
+
+def split_spec(o_spec):
+    """
+    Split a spec into single characteristics.
+
+    Parameters
+    ----------
+    o_spec : orca_test.OrcaSpec
+
+    Returns
+    -------
+    parts : list of tuples
+        Each tuple has an item name, the name of the table it refers to (or None for
+        injectables), and a function with no arguments that asserts the characteristic.
+
+    """
+    parts = []
+
+    # Partial functions can be pickled, so parts can be sent to other processes
+    def add(name, table_name, func, *args, **kwargs):
+        parts.append((name, table_name, functools.partial(func, *args, **kwargs)))
+
+    for t_spec in o_spec.tables:
+        for k, part_props in split_properties(t_spec.properties):
+            # The Parquet path is used by the column characteristics
+            if k == 'parquet':
+                continue
+            part_props.pop('parquet', None)
+            add('%s[%s]' % (t_spec.name, k), t_spec.name,
+                assert_table_spec, TableSpec(t_spec.name, **part_props))
+
+        for c_spec in t_spec.columns:
+            for k, part_props in split_properties(c_spec.properties):
+                # The missing-value coding qualifies the other characteristics, but is
+                # only asserted in its own part
+                kwargs = {}
+                if (k != 'missing_val_coding') and ('missing_val_coding' in part_props):
+                    kwargs['missing_val_coding'] = part_props.pop('missing_val_coding')
+                add('%s.%s[%s]' % (t_spec.name, c_spec.name, k), t_spec.name,
+                    assert_column_spec, t_spec.name, ColumnSpec(c_spec.name, **part_props),
+                    parquet=t_spec.properties.get('parquet'), **kwargs)
+
+    for i_spec in o_spec.injectables:
+        for k, part_props in split_properties(i_spec.properties):
+            add('%s[%s]' % (i_spec.name, k), None,
+                assert_injectable_spec, InjectableSpec(i_spec.name, **part_props))
+
+    # Specs can repeat a characteristic, but item names need to be unique
+    seen = {}
+    for i, (name, table_name, func) in enumerate(parts):
+        seen[name] = seen.get(name, 0) + 1
+        if seen[name] > 1:
+            parts[i] = ('%s-%d' % (name, seen[name]), table_name, func)
+    return parts
+
+
+def schedule_spec(o_spec):
+    """
+    Order a spec's characteristics to limit how many generated tables need to be held
+    in memory at once. Characteristics are grouped by table, and each next table is the
+    one that needs the fewest tables that aren't already in use (for example, the
+    parent tables of foreign keys). Each table is released after the last group of
+    characteristics that uses it. Injectables are asserted last.
+    
+    Parameters
+    ----------
+    o_spec : orca_test.OrcaSpec
+    
+    Returns
+    -------
+    steps : list of tuples
+        Each tuple has a table name (or None for the injectables), the characteristics
+        of that table in the format returned by split_spec(), the set of tables they
+        use, and the set of tables that are not used by any later step.
+    
+    """
+    groups = {}
+    order = []
+    for part in split_spec(o_spec):
+        if part[1] not in groups:
+            groups[part[1]] = []
+            order.append(part[1])
+        groups[part[1]].append(part)
+    
+    uses = {None: set()}
+    for table_name in order:
+        if table_name is not None:
+            t_specs = [t for t in o_spec.tables if t.name == table_name]
+            uses[table_name] = set(get_spec_columns(OrcaSpec('', *t_specs)).keys())
+    
+    remaining = [t for t in order if t is not None]
+    live = set()
+    steps = []
+    while len(remaining) > 0:
+        table_name = min(remaining, key=lambda t: len(uses[t] - live))
+        remaining.remove(table_name)
+        live.update(uses[table_name])
+        
+        needed_later = set()
+        for t in remaining:
+            needed_later.update(uses[t])
+        release = live - needed_later
+        live -= release
+        steps.append((table_name, groups[table_name], uses[table_name], release))
+    
+    if None in groups:
+        steps.append((None, groups[None], set(), set()))
+    return steps
+
+
+def parse_memory(value):
+    """
+    Convert a memory size like '16GB' or '500 MB' to a number of bytes. Units are
+    powers of 1024, and a number is returned unchanged.
+    
+    """
+    if not isinstance(value, str):
+        return value
+    
+    units = {'B': 1, 'KB': 1024, 'MB': 1024**2, 'GB': 1024**3, 'TB': 1024**4}
+    number = value.strip().upper().rstrip('BKMGT ')
+    unit = value.strip().upper()[len(number):].strip() or 'B'
+    try:
+        return float(number) * units[unit]
+    except (ValueError, KeyError):
+        msg = "Memory size '%s' is not valid; use a format like '16GB'" % value
+        raise OrcaAssertionError(msg)
+
+
+def get_spec_memory_usage(table_name, column_names):
+    """
+    Helper function. Memory used by a generated table's cached DataFrame, if it's
+    registered as a function, and by the computed columns in a list. The table and
+    columns should already be cached, or they will be generated.
+    
+    """
+    n_bytes = 0
+    if orca.table_type(table_name) == 'function':
+        n_bytes += orca.get_table(table_name).local.memory_usage(deep=True).sum()
+    
+    computed = orca.list_columns_for_table(table_name)
+    for column_name in column_names:
+        if column_name in computed:
+            n_bytes += get_column_or_index(table_name, column_name).memory_usage(deep=True)
+    return n_bytes
+
+
+def assert_scheduled_spec(o_spec, max_memory=None):
+    """
+    Assert a spec in the order given by schedule_spec(). Each table is generated once
+    and cached while its characteristics are asserted, along with its computed columns,
+    and cleared from the cache after its last use. This includes tables and columns
+    that orca was already caching, which are generated again if they're used later.
+    
+    Tables are scheduled as a whole rather than column by column, because orca
+    generates a table registered as a function all at once.
+    
+    Parameters
+    ----------
+    o_spec : orca_test.OrcaSpec
+    max_memory : int or str, optional
+        Memory budget for cached tables, in bytes or as a str like '16GB'. Each table is
+        measured once, after the first step that generates it, with
+        DataFrame.memory_usage(deep=True) for tables registered as functions, plus the
+        computed columns that the spec refers to. If the tables needed by a step are
+        over the budget on their own, a warning is issued, and otherwise tables that the
+        next step doesn't need are cleared from the cache until the rest fit.
+    
+    Returns
+    -------
+    None
+    
+    """
+    budget = parse_memory(max_memory)
+    cache = SessionTableCache()
+    steps = schedule_spec(o_spec)
+    columns = get_spec_columns(o_spec)
+    sizes = {}
+    
+    # Tables that only have their registration checked are never generated, and tables
+    # loaded from Parquet files may only be checked from the files' statistics
+    generated = set(t for t, cols in columns.items() if len(cols) > 0)
+    for t_spec in o_spec.tables:
+        if any(k != 'registered' for k in t_spec.properties):
+            generated.add(t_spec.name)
+        if 'parquet' in t_spec.properties:
+            generated.discard(t_spec.name)
+    
+    try:
+        for i, (table_name, parts, uses, release) in enumerate(steps):
+            for t in uses:
+                cache.enable(t)
+            for name, t, func in parts:
+                func()
+            
+            if budget is not None:
+                # Cached tables don't change, so each one only needs to be measured once
+                for t in uses:
+                    if (t not in sizes) and (t in generated) and orca.is_table(t):
+                        sizes[t] = get_spec_memory_usage(t, columns[t])
+                
+                needed = sum(sizes.get(t, 0) for t in uses)
+                if needed > budget:
+                    warnings.warn("Tables needed to assert '%s' use %.2f MB, over the memory "
+                                  "budget of %.2f MB" % (table_name or 'injectables',
+                                  needed / 1024.**2, budget / 1024.**2))
+            
+            for t in release:
+                cache.release(t)
+                sizes.pop(t, None)
+            
+            if (budget is None) or (i + 1 == len(steps)):
+                continue
+            
+            # Over budget, clear the largest tables that the next step doesn't need
+            next_uses = steps[i + 1][2]
+            for t in sorted(sizes, key=sizes.get, reverse=True):
+                if sum(sizes.values()) <= budget:
+                    break
+                if t not in next_uses:
+                    cache.release(t)
+                    del sizes[t]
+    finally:
+        cache.restore()
+    return
+
+
 """
 ###################
 ASSERTION FUNCTIONS
@@ -253,7 +732,8 @@ def assert_table_not_registered(table_name):
     return
 
 
-def assert_table_can_be_generated(table_name):
+def assert_table_can_be_generated(table_name, max_seconds=None, max_peak_mb=None,
+                                  repeat=1, warmup=0):
     """
     Does a registered table exist as a DataFrame? If a table was registered as a function
     wrapper, this assertion evaluates the function and fails is there are any errors.
@@ -264,6 +744,26 @@ def assert_table_can_be_generated(table_name):
     those methods will be aware of caching, and not regenerate the table if it already
     exists. There no way to tell externally whether a table is cached or not. That might
     be a useful thing to add to the orca API. 
+    
+    Optionally, this also asserts a performance budget for the table's function. See
+    assert_generation_budget() for details.
+    
+    Parameters
+    ----------
+    table_name : str
+    max_seconds : int or float, optional
+        Maximum time to generate the table.
+    max_peak_mb : int or float, optional
+        Maximum memory allocated at peak while generating the table, in megabytes.
+    repeat : int, optional
+        Number of times to generate the table for each measurement, using the best result.
+    warmup : int, optional
+        Number of times to generate the table before measuring.
+    
+    Returns
+    -------
+    None
+    
     """
     assert_table_is_registered(table_name)
     
@@ -274,9 +774,276 @@ def assert_table_can_be_generated(table_name):
             # TODO: issues #3 log backtrace
             msg = "Table '%s' is registered but cannot be generated" % table_name
             raise OrcaAssertionError(msg)
+        
+        assert_generation_budget("Table '%s'" % table_name, orca.get_raw_table(table_name),
+                                 max_seconds, max_peak_mb, repeat, warmup)
+    return
+
+
+def measure_generation(wrapper, repeat=1, warmup=0, memory=False):
+    """
+    Measure the time or peak memory needed to evaluate an orca function wrapper. The
+    wrapper's own cache is bypassed, but tables, columns, and injectables that it depends
+    on are taken from the cache if they're cached, so warm-up runs can be used to leave
+    them out of the measurement.
+    
+    Time and memory are measured in separate runs, because tracing memory allocations
+    slows Python down. Memory is traced with the tracemalloc module, which includes
+    allocations by numpy and pandas.
+    
+    Parameters
+    ----------
+    wrapper : orca wrapper
+        Table, column, or injectable function wrapper.
+    repeat : int, optional
+        Number of measured runs. The best result is returned.
+    warmup : int, optional
+        Number of runs before measuring.
+    memory : bool, optional
+        Whether to measure peak memory instead of time.
+    
+    Returns
+    -------
+    result : float
+        Seconds, or bytes of peak memory allocated during the run.
+    
+    """
+    cache = wrapper.cache
+    wrapper.cache = False
+    try:
+        for i in range(warmup):
+            _ = wrapper()
+        
+        results = []
+        for i in range(repeat):
+            if memory:
+                # Leave tracing on if something else started it
+                tracing = tracemalloc.is_tracing()
+                if not tracing:
+                    tracemalloc.start()
+                elif hasattr(tracemalloc, 'reset_peak'):
+                    tracemalloc.reset_peak()
+                try:
+                    start = tracemalloc.get_traced_memory()[0]
+                    _ = wrapper()
+                    results.append(tracemalloc.get_traced_memory()[1] - start)
+                finally:
+                    if not tracing:
+                        tracemalloc.stop()
+            else:
+                start = time.time()
+                _ = wrapper()
+                results.append(time.time() - start)
+    finally:
+        wrapper.cache = cache
+    return min(results)
+
+
+def assert_generation_budget(description, wrapper, max_seconds=None, max_peak_mb=None,
+                             repeat=1, warmup=0):
+    """
+    Asserts limits on the time and peak memory needed to evaluate an orca function
+    wrapper, measured with measure_generation(). This is used by the can_be_generated
+    assertions for tables, columns, and injectables.
+    
+    Parameters
+    ----------
+    description : str
+        For example "Table 'buildings'", for failure messages.
+    wrapper : orca wrapper
+    max_seconds : int or float, optional
+    max_peak_mb : int or float, optional
+    repeat : int, optional
+    warmup : int, optional
+    
+    Returns
+    -------
+    None
+    
+    """
+    if max_seconds is not None:
+        seconds = measure_generation(wrapper, repeat, warmup)
+        if not seconds <= max_seconds:
+            msg = "%s took %.3f seconds to generate, above limit of %s" \
+                    % (description, seconds, str(max_seconds))
+            raise OrcaAssertionError(msg)
+    
+    if max_peak_mb is not None:
+        # Warm-up runs were already done if time was measured
+        if max_seconds is not None:
+            warmup = 0
+        
+        mb = measure_generation(wrapper, repeat, warmup, memory=True) / 2.0**20
+        if not mb <= max_peak_mb:
+            msg = "%s used %.1f MB at peak to generate, above limit of %s MB" \
+                    % (description, mb, str(max_peak_mb))
+            raise OrcaAssertionError(msg)
+    return
+
+
+def generation_budget(properties, k):
+    """
+    Helper function. Translates a generation budget characteristic of a spec object,
+    along with its qualifiers, into arguments for the can_be_generated assertions.
+    
+    """
+    budget = {'repeat': properties.get('generation_repeat', 1),
+              'warmup': properties.get('generation_warmup', 0)}
+    if k == 'max_generation_seconds':
+        budget['max_seconds'] = properties[k]
+    else:
+        budget['max_peak_mb'] = properties[k]
+    return budget
+
+
+def get_table_memory_usage(table_name, deep=False):
+    """
+    Memory used by a table's local columns and index, in bytes. Computed columns are not
+    included, because they aren't stored with the table.
+    
+    Parameters
+    ----------
+    table_name : str
+    deep : bool, optional
+        Whether to include the memory used by the contents of object columns, which is
+        slower to measure (see pandas.DataFrame.memory_usage).
+    
+    Returns
+    -------
+    usage : pandas.Series
+        Bytes used by each column, with the index labeled 'Index'.
+    
+    """
+    assert_table_can_be_generated(table_name)
+    return orca.get_table(table_name).local.memory_usage(index=True, deep=deep)
+
+
+def assert_table_max_memory(table_name, max_mb, deep=False):
+    """
+    Asserts a limit on the memory used by a table's local columns and index.
+    
+    Parameters
+    ----------
+    table_name : str
+    max_mb : int or float
+        Maximum memory, in megabytes (2**20 bytes).
+    deep : bool, optional
+        Whether to include the memory used by the contents of object columns.
+    
+    Returns
+    -------
+    None
+    
+    """
+    usage = get_table_memory_usage(table_name, deep)
+    mb = usage.sum() / 2.0**20
+    
+    if not mb <= max_mb:
+        msg = "Table '%s' uses %.2f MB of memory, above limit of %s MB (largest column " \
+              "is '%s')" % (table_name, mb, str(max_mb), str(usage.idxmax()))
+        raise OrcaAssertionError(msg)
+    return
+
+
+def assert_table_max_bytes_per_row(table_name, max_bytes, deep=False):
+    """
+    Asserts a limit on the memory used by each row of a table's local columns and index,
+    on average.
+    
+    Parameters
+    ----------
+    table_name : str
+    max_bytes : int or float
+    deep : bool, optional
+        Whether to include the memory used by the contents of object columns.
+    
+    Returns
+    -------
+    None
+    
+    """
+    usage = get_table_memory_usage(table_name, deep)
+    rows = len(orca.get_table(table_name))
+    if rows == 0:
+        return
+    
+    per_row = float(usage.sum()) / rows
+    if not per_row <= max_bytes:
+        msg = "Table '%s' uses %.1f bytes per row, above limit of %s" \
+                % (table_name, per_row, str(max_bytes))
+        raise OrcaAssertionError(msg)
     return
 
 
+def get_downcast_report(table_name, deep=True, max_portion_unique=0.5):
+    """
+    Lists the local columns of a table that could be stored in a smaller dtype without
+    changing their values: integers whose range fits a narrower integer type, floats
+    whose values are all exactly representable as float32, and object or string
+    columns with few enough unique values to be stored as categoricals.
+    
+    Parameters
+    ----------
+    table_name : str
+    deep : bool, optional
+        Whether to include the memory used by the contents of object columns.
+    max_portion_unique : float from 0 to 1, optional
+        Object and string columns are suggested as categoricals if the number of unique
+        values is at most this portion of the number of rows.
+    
+    Returns
+    -------
+    report : pandas.DataFrame
+        One row per column that could be downcast, with the current 'dtype' and
+        'bytes', and the 'suggested_dtype' and its 'suggested_bytes'.
+    
+    """
+    assert_table_can_be_generated(table_name)
+    df = orca.get_table(table_name).local
+    
+    rows = []
+    for name in df.columns:
+        ds = df[name]
+        n_bytes = ds.memory_usage(index=False, deep=deep)
+        suggested = None
+        
+        if isinstance(ds.dtype, pd.CategoricalDtype):
+            continue
+        
+        elif pd.api.types.is_integer_dtype(ds.dtype) and isinstance(ds.dtype, np.dtype) \
+                and len(ds) > 0:
+            lo, hi = ds.min(), ds.max()
+            for dtype in ['uint8', 'int8', 'uint16', 'int16', 'uint32', 'int32']:
+                info = np.iinfo(dtype)
+                if (info.min <= lo) and (hi <= info.max):
+                    suggested = np.dtype(dtype)
+                    break
+        
+        elif ds.dtype == 'float64':
+            as_float32 = ds.astype('float32').astype('float64')
+            if ((as_float32 == ds) | ds.isnull()).all():
+                suggested = np.dtype('float32')
+        
+        elif (pd.api.types.is_object_dtype(ds.dtype) or 
+              pd.api.types.is_string_dtype(ds.dtype)) and len(ds) > 0:
+            if ds.nunique() <= max_portion_unique * len(ds):
+                suggested = 'category'
+        
+        if suggested is None:
+            continue
+        
+        if suggested == 'category':
+            suggested_bytes = ds.astype('category').memory_usage(index=False, deep=deep)
+        else:
+            suggested_bytes = len(ds) * suggested.itemsize
+        
+        if suggested_bytes < n_bytes:
+            rows.append((name, str(ds.dtype), n_bytes, str(suggested), suggested_bytes))
+    
+    return pd.DataFrame(rows, columns=['column', 'dtype', 'bytes', 'suggested_dtype',
+                                       'suggested_bytes'])
+
+
 def assert_column_is_registered(table_name, column_name):
     """
     Local columns are registered when their table is evaluated, but stand-alone columns
@@ -323,19 +1090,30 @@ def assert_column_not_registered(table_name, column_name):
     return
 
 
-def assert_column_can_be_generated(table_name, column_name):
+def assert_column_can_be_generated(table_name, column_name, max_seconds=None,
+                                   max_peak_mb=None, repeat=1, warmup=0):
     """
     There are four types of columns: (1) local columns of a registered table, (2) the 
     index of a registered table, (3) SeriesWrapper columns associated with a table, and
     (4) ColumnFuncWrapper columns associated with a table. 
     
     Only the ColumnFuncWrapper columns need to be tested here, because the others already 
-    exist at the point when they're registered. 
+    exist at the point when they're registered. Performance budgets also only apply to
+    ColumnFuncWrapper columns (see assert_generation_budget()).
     
     Parameters
     ----------
     table_name : str
     column_name : str
+    max_seconds : int or float, optional
+        Maximum time to generate the column.
+    max_peak_mb : int or float, optional
+        Maximum memory allocated at peak while generating the column, in megabytes.
+    repeat : int, optional
+        Number of times to generate the column for each measurement, using the best
+        result.
+    warmup : int, optional
+        Number of times to generate the column before measuring.
     
     Returns
     -------
@@ -357,6 +1135,10 @@ def assert_column_can_be_generated(table_name, column_name):
             # TODO: issues #3 log backtrace
             msg = "Column '%s' is registered but cannot be generated" % column_name
             raise OrcaAssertionError(msg)
+        
+        assert_generation_budget("Column '%s'" % column_name,
+                                 orca.get_raw_column(table_name, column_name),
+                                 max_seconds, max_peak_mb, repeat, warmup)
     return
 
 
@@ -413,8 +1195,6 @@ def assert_column_is_unique(table_name, column_name):
     None
     
     """
-    assert_column_can_be_generated(table_name, column_name)
-    
     ds = get_column_or_index(table_name, column_name)
     
     if len(ds.unique()) != len(ds):
@@ -425,7 +1205,7 @@ def assert_column_is_unique(table_name, column_name):
 
 
 def assert_column_is_foreign_key(table_name, column_name, parent_table_name,
-                                 parent_column_name, missing_val_coding=np.nan):
+                                 parent_column_name, missing_val_coding=np.nan, rows=None):
     """
     Asserts that a column is a foreign key whose values correspond to the primary key
     column of a parent table. This confirms the integrity of "broadcast" relationships.
@@ -443,30 +1223,112 @@ def assert_column_is_foreign_key(table_name, column_name, parent_table_name,
     Note that this assertion is fairly strict, and there are valid "broadcast" 
     relationships that would fail it. But it corresponds well to the standard usage.
     
+    To check only a range of the foreign key column's rows, pass their positions as
+    rows=(start, stop).
+    
     """
-    assert_column_can_be_generated(table_name, column_name)
+    ds_child = get_column_or_index(table_name, column_name, rows)
     assert_column_is_primary_key(parent_table_name, parent_column_name)
-
     ds_parent = get_column_or_index(parent_table_name, parent_column_name)
-    ds_child = get_column_or_index(table_name, column_name)
-    # Foreign key in child table may have missing values, but primary key should not
-    ds_child = strip_missing_values(ds_child, missing_val_coding)
     
-    # Identify values in ds_child that are not in ds_parent
-    diff = np.setdiff1d(ds_child.values, ds_parent.values)
-    if len(diff) != 0:
+    # Foreign key in child table may have missing values, but primary key should not
+    skip = get_shared_missing_mask(table_name, column_name, ds_child, missing_val_coding)
+    i = find_first_not_in(ds_child, ds_parent.values, skip=skip,
+                          missing_val_coding=missing_val_coding)
+    if i is not None:
         msg = "Column '%s.%s' has values that are not in '%s.%s'" \
                 % (table_name, column_name, parent_table_name, parent_column_name)
         if column_name != parent_column_name:
             msg = "Column '%s' has values that are not in '%s'" \
                     % (column_name, parent_column_name)
-        raise OrcaAssertionError(msg)
+        raise OrcaAssertionError(msg + describe_position(ds_child, i, rows))
     return
 
 
-def get_column_or_index(table_name, column_name):
+def count_mask_characteristics(c_spec, parquet=None):
     """
-    This generalizes the orca method .get_column(), which fails if you request an index.
+    Helper function. Returns the number of assertions about a column that use a mask of
+    its missing values. The string characteristics are asserted together, so they count
+    once, and characteristics asserted from a Parquet file's statistics don't count.
+
+    """
+    keys = [k for k in c_spec.properties if k in MASK_CHARACTERISTICS]
+    if parquet is not None:
+        keys = [k for k in keys if k not in PARQUET_CHARACTERISTICS]
+    if any(k in STRING_CHARACTERISTICS for k in keys):
+        keys = [k for k in keys if k not in STRING_CHARACTERISTICS] + ['strings']
+    return len(keys)
+
+
+def find_first(series, violates, chunk_size=None, skip=None, missing_val_coding=None):
+    """
+    Helper function. Scans a series in fixed-size blocks and returns the position of
+    the first entry that violates a condition, or None. Each block is checked with a
+    vectorized function, and the scan stops at the first block with a violation, so
+    assertions can fail quickly without copying or scanning the whole column.
+    
+    Parameters
+    ----------
+    series : pandas.Series
+    violates : function
+        Takes a block of the series and returns a boolean array that is True for
+        entries that violate the condition. Null results, from nullable dtypes, are
+        treated as False.
+    chunk_size : int, optional
+        Number of entries per block. Defaults to CHUNK_SIZE.
+    skip : numpy.ndarray of bool, optional
+        True for entries to skip, such as a mask from get_shared_missing_mask().
+    missing_val_coding : {np.nan, int, str, set}, optional
+        If provided, and skip isn't, missing entries are skipped, with the mask built
+        for each block as it's checked.
+
+    Returns
+    -------
+    position : int or None
+
+    """
+    if chunk_size is None:
+        chunk_size = CHUNK_SIZE
+
+    for start in range(0, len(series), chunk_size):
+        block = series.iloc[start:start + chunk_size]
+        failed = pd.array(violates(block), dtype='boolean')
+        failed = failed.to_numpy(dtype=bool, na_value=False)
+        if skip is not None:
+            failed &= ~skip[start:start + chunk_size]
+        elif missing_val_coding is not None:
+            failed &= ~missing_values_mask(block, missing_val_coding)
+        if failed.any():
+            return start + int(np.argmax(failed))
+    return None
+
+
+def find_first_not_in(series, values, skip=None, missing_val_coding=None):
+    """
+    Helper function. Returns the position of the first entry of a series that is not
+    skipped or missing and not in a list of values, or None. The values are hashed once,
+    and the series is scanned in blocks with find_first().
+
+    """
+    allowed = pd.Index(values).unique()
+    return find_first(series, lambda block: allowed.get_indexer(block) == -1, skip=skip,
+                      missing_val_coding=missing_val_coding)
+
+
+def describe_position(series, i, rows=None):
+    """
+    Helper function. Describes the entry of a series at position i, for failure
+    messages. If the series is a range of rows from get_column_or_index(), the row
+    number is given in the whole column.
+    
+    """
+    row = i if rows is None else rows[0] + i
+    return ", e.g. %s in row %d (index %s)" % (str(series.iloc[i]), row, str(series.index[i]))
+
+
+def get_column_or_index(table_name, column_name, rows=None):
+    """
+    This generalizes the orca method .get_column(), which fails if you request an index.
     
     Parameters
     ----------
@@ -474,19 +1336,38 @@ def get_column_or_index(table_name, column_name):
         Name of table that the column is associated with.
     column_name : str
         Name of a local column, index, SeriesWrapper, or ColumnFuncWrapper.
+    rows : tuple of int, optional
+        Positions of the first row to return and the row after the last. The whole
+        column is still generated.
     
     Returns 
     -------
     series : pandas.Series
+        Local columns and the index are not copied, so the series should not be
+        modified.
     
     """
-    assert_column_can_be_generated(table_name, column_name)
+    assert_column_is_registered(table_name, column_name)
     t = orca.get_table(table_name)
     
     if column_name in t.index.names:
-        return t.index.get_level_values(column_name).to_series()
+        ds = t.index.get_level_values(column_name).to_series()
+    
+    # Local columns are read from the table directly, because .get_column() copies them
+    # by default
+    elif column_name not in orca.list_columns_for_table(table_name):
+        ds = t.local[column_name]
+    
     else:
-        return t.get_column(column_name)
+        try:
+            ds = orca.get_raw_column(table_name, column_name)()
+        except:
+            msg = "Column '%s' is registered but cannot be generated" % column_name
+            raise OrcaAssertionError(msg)
+    
+    if rows is not None:
+        ds = ds.iloc[rows[0]:rows[1]]
+    return ds
     
 
 def assert_column_is_numeric(table_name, column_name):
@@ -505,15 +1386,72 @@ def assert_column_is_numeric(table_name, column_name):
     None
     
     """
-    assert_column_can_be_generated(table_name, column_name)
-    dtype = get_column_or_index(table_name, column_name).dtype
+    check_numeric_dtype(column_name, get_column_or_index(table_name, column_name).dtype)
+    return
+
+
+def check_numeric_dtype(column_name, dtype):
+    """
+    Helper function. Asserts that a dtype is numeric, for assertions that already have
+    the column and don't need to fetch it again.
     
-    if dtype not in ['int16', 'int32', 'int64', 'float16', 'float32', 'float64']:
+    """
+    if dtype not in ['int16', 'int32', 'int64', 'float16', 'float32', 'float64',
+                     'Int16', 'Int32', 'Int64', 'Float32', 'Float64']:
         msg = "Column '%s' has type '%s' (not numeric)" % (column_name, dtype)
         raise OrcaAssertionError(msg)
     return
 
 
+def assert_column_dtype_not_wider_than(table_name, column_name, dtype):
+    """
+    Asserts that a column's values take up no more bytes each than a given dtype, for
+    example to catch columns that are unintentionally stored as 'int64' or 'float64'.
+    Categorical columns are measured by the dtype of their codes. Object and string
+    columns only pass if the given dtype is 'object'.
+    
+    Parameters
+    ----------
+    table_name : str
+    column_name : str
+    dtype : str, numpy.dtype, or pandas extension dtype
+        For example 'int32', 'float32', or 'Int32'.
+    
+    Returns
+    -------
+    None
+    
+    """
+    try:
+        limit = pd.api.types.pandas_dtype(dtype)
+    except TypeError:
+        msg = "Type '%s' for column '%s' is not a recognized dtype" % (str(dtype), column_name)
+        raise OrcaAssertionError(msg)
+    
+    ds = get_column_or_index(table_name, column_name)
+    
+    actual = ds.dtype
+    if isinstance(actual, pd.CategoricalDtype):
+        actual = ds.cat.codes.dtype
+    
+    itemsize = getattr(actual, 'itemsize', None)
+    if pd.api.types.is_object_dtype(actual) or pd.api.types.is_string_dtype(actual):
+        itemsize = None
+    
+    if limit.kind == 'O':
+        return
+    
+    if getattr(limit, 'itemsize', None) is None:
+        msg = "Type '%s' for column '%s' does not have a fixed width" % (str(limit), column_name)
+        raise OrcaAssertionError(msg)
+    
+    if (itemsize is None) or (itemsize > limit.itemsize):
+        msg = "Column '%s' has type '%s', wider than '%s'" \
+                % (column_name, ds.dtype, limit)
+        raise OrcaAssertionError(msg)
+    return
+
+
 def strip_missing_values(series, missing_val_coding=np.nan):
     """
     Helper function. Returns a pd.Series with missing values stripped.
@@ -521,24 +1459,110 @@ def strip_missing_values(series, missing_val_coding=np.nan):
     Parameters
     ----------
     series : pandas.Series
-    missing_val_coding : {np.nan, int, str}, optional
+    missing_val_coding : {np.nan, int, str, set}, optional
         Value that indicates missing entries.
     
     Returns
     -------
     series : pandas.Series
-    
+
     """
-    # For np.nan
-    if np.isnan(missing_val_coding):
-        return series.dropna()
-    
-    # For int or str
-    else:
-        return series[series != missing_val_coding].copy()
+    return series[~missing_values_mask(series, missing_val_coding)].copy()
+
+
+def split_missing_val_coding(missing_val_coding):
+    """
+    Helper function. Splits a missing_val_coding into whether null entries are missing,
+    and a list of the other values that indicate missing entries.
+
+    Parameters
+    ----------
+    missing_val_coding : {np.nan, int, str, set}
+
+    Returns
+    -------
+    nulls : bool
+    values : list
 
+    """
+    codings = missing_val_coding
+    if not isinstance(codings, (set, frozenset, list, tuple)):
+        codings = [codings]
+
+    values = [v for v in codings if not pd.isnull(v)]
+    return len(values) < len(codings), values
 
-def assert_column_missing_value_coding(table_name, column_name, missing_val_coding):
+
+def missing_values_mask(series, missing_val_coding=np.nan):
+    """
+    Helper function. Returns a boolean array that is True for a series' missing entries,
+    which lets callers filter several aligned arrays without copying the series.
+
+    Null entries are found with pd.isnull(), which covers np.nan, None, pd.NA, and pd.NaT
+    in any dtype, and other values with a single hash lookup per entry (Series.isin()),
+    which works natively with nullable, string, and categorical dtypes.
+
+    Parameters
+    ----------
+    series : pandas.Series
+    missing_val_coding : {np.nan, int, str, set}, optional
+        Value that indicates missing entries, or a set (or list) of values, such as
+        {-1, 0, np.nan}.
+
+    Returns
+    -------
+    mask : numpy.ndarray of bool
+
+    """
+    nulls, values = split_missing_val_coding(missing_val_coding)
+
+    # Strings can't match the entries of a numeric column, and would make isin() compare
+    # them as objects
+    if pd.api.types.is_numeric_dtype(series.dtype):
+        values = [v for v in values if not isinstance(v, str)]
+
+    mask = np.zeros(len(series), dtype=bool)
+    if nulls:
+        mask |= np.asarray(pd.isnull(series))
+    if len(values) > 0:
+        mask |= np.asarray(series.isin(values))
+    return mask
+
+
+# Masks of missing values shared by the assertions in a call to assert_column_spec(),
+# keyed by table, column, and missing_val_coding, or None outside of a call
+_shared_masks = None
+
+
+def get_missing_mask(table_name, column_name, series, missing_val_coding=np.nan):
+    """
+    Helper function. Returns missing_values_mask() for a column, reusing the mask from
+    an earlier assertion about the same column in the same call to assert_column_spec().
+
+    """
+    if _shared_masks is None:
+        return missing_values_mask(series, missing_val_coding)
+
+    key = (table_name, column_name, repr(missing_val_coding))
+    if key not in _shared_masks:
+        _shared_masks[key] = missing_values_mask(series, missing_val_coding)
+    return _shared_masks[key]
+
+
+def get_shared_missing_mask(table_name, column_name, series, missing_val_coding=np.nan):
+    """
+    Helper function. Returns get_missing_mask() for a column if masks are shared by
+    several assertions in the current call to assert_column_spec(), or None, in which
+    case callers that scan the column with find_first() build masks a block at a time.
+
+    """
+    if _shared_masks is None:
+        return None
+    return get_missing_mask(table_name, column_name, series, missing_val_coding)
+
+
+def assert_column_missing_value_coding(table_name, column_name, missing_val_coding,
+                                       rows=None):
     """
     Asserts that a column's missing entries are all coded with a particular value.
     
@@ -546,26 +1570,28 @@ def assert_column_missing_value_coding(table_name, column_name, missing_val_codi
     ----------
     table_name : str
     column_name : str
-    missing_val_coding : {np.nan, int, str}
+    missing_val_coding : {np.nan, int, str, set}
         Value that indicates missing entries.
+    rows : tuple of int, optional
+        Positions of the first row to check and the row after the last, to check only a
+        range of the column's rows. Failure messages give positions in the whole column.
     
     Returns
     -------
     None
     
     """
-    assert_column_can_be_generated(table_name, column_name)
-    ds = get_column_or_index(table_name, column_name)
-    ds = strip_missing_values(ds, missing_val_coding)
+    ds = get_column_or_index(table_name, column_name, rows)
+    missing = get_missing_mask(table_name, column_name, ds, missing_val_coding)
 
-    if sum(pd.isnull(ds)) != 0:
+    if np.asarray(pd.isnull(ds))[~missing].any():
         msg = "Column '%s' has null entries that are not coded as %s" \
                 % (column_name, str(missing_val_coding))
         raise OrcaAssertionError(msg)
     return
 
 
-def assert_column_max(table_name, column_name, maximum, missing_val_coding=np.nan):
+def assert_column_max(table_name, column_name, maximum, missing_val_coding=np.nan, rows=None):
     """
     Asserts a maximum value for a numeric column, ignoring missing values.
     
@@ -574,26 +1600,31 @@ def assert_column_max(table_name, column_name, maximum, missing_val_coding=np.na
     table_name : str
     column_name : str
     maximum : int or float
-    missing_val_coding : {np.nan, int, str}, optional
+    missing_val_coding : {np.nan, int, str, set}, optional
         Value that indicates missing entries.
+    rows : tuple of int, optional
+        Positions of the first row to check and the row after the last, to check only a
+        range of the column's rows. Failure messages give positions in the whole column.
     
     Returns
     -------
     None
     
     """
-    assert_column_is_numeric(table_name, column_name)
-    ds = get_column_or_index(table_name, column_name)
-    ds = strip_missing_values(ds, missing_val_coding)
-    
-    if not ds.max() <= maximum:
-        msg = "Column '%s' has maximum value of %s, not %s" \
-                % (column_name, str(ds.max()), str(maximum))
-        raise OrcaAssertionError(msg)
+    ds = get_column_or_index(table_name, column_name, rows)
+    check_numeric_dtype(column_name, ds.dtype)
+    
+    skip = get_shared_missing_mask(table_name, column_name, ds, missing_val_coding)
+    i = find_first(ds, lambda block: block > maximum, skip=skip,
+                   missing_val_coding=missing_val_coding)
+    if i is not None:
+        msg = "Column '%s' has values above the maximum of %s" \
+                % (column_name, str(maximum))
+        raise OrcaAssertionError(msg + describe_position(ds, i, rows))
     return
     
 
-def assert_column_min(table_name, column_name, minimum, missing_val_coding=np.nan):
+def assert_column_min(table_name, column_name, minimum, missing_val_coding=np.nan, rows=None):
     """
     Asserts a minimum value for a numeric column, ignoring missing values.
     
@@ -602,22 +1633,27 @@ def assert_column_min(table_name, column_name, minimum, missing_val_coding=np.na
     table_name : str
     column_name : str
     minimum : int or float
-    missing_val_coding : {np.nan, int, str}, optional
+    missing_val_coding : {np.nan, int, str, set}, optional
         Value that indicates missing entries.
+    rows : tuple of int, optional
+        Positions of the first row to check and the row after the last, to check only a
+        range of the column's rows. Failure messages give positions in the whole column.
     
     Returns
     -------
     None
     
     """
-    assert_column_is_numeric(table_name, column_name)
-    ds = get_column_or_index(table_name, column_name)
-    ds = strip_missing_values(ds, missing_val_coding)
-    
-    if not ds.min() >= minimum:
-        msg = "Column '%s' has minimum value of %s, not %s" \
-                % (column_name, str(ds.min()), str(minimum))
-        raise OrcaAssertionError(msg)
+    ds = get_column_or_index(table_name, column_name, rows)
+    check_numeric_dtype(column_name, ds.dtype)
+    
+    skip = get_shared_missing_mask(table_name, column_name, ds, missing_val_coding)
+    i = find_first(ds, lambda block: block < minimum, skip=skip,
+                   missing_val_coding=missing_val_coding)
+    if i is not None:
+        msg = "Column '%s' has values below the minimum of %s" \
+                % (column_name, str(minimum))
+        raise OrcaAssertionError(msg + describe_position(ds, i, rows))
     return
 
 
@@ -631,7 +1667,7 @@ def assert_column_max_portion_missing(table_name, column_name, portion, missing_
     column_name : str
     portion : float from 0 to 1
         Maximum portion of entries that may be missing.
-    missing_val_coding : {np.nan, int, str}, optional
+    missing_val_coding : {np.nan, int, str, set}, optional
         Value that indicates missing entries.
     
     Returns
@@ -639,10 +1675,32 @@ def assert_column_max_portion_missing(table_name, column_name, portion, missing_
     None
     
     """
-    assert_column_can_be_generated(table_name, column_name)
     ds = get_column_or_index(table_name, column_name)
-    missing = len(ds) - len(strip_missing_values(ds, missing_val_coding))
-    missing_portion = float(missing) / len(ds)
+    missing = int(get_missing_mask(table_name, column_name, ds, missing_val_coding).sum())
+    assert_portion_missing(column_name, missing, len(ds), portion)
+    return
+
+
+def assert_portion_missing(column_name, missing, rows, portion):
+    """
+    Helper function. Asserts the maximum portion of missing entries, given counts of
+    missing entries and rows, which may be totals from several parts of a column.
+    
+    Parameters
+    ----------
+    column_name : str
+    missing : int
+    rows : int
+    portion : float from 0 to 1
+    
+    Returns
+    -------
+    None
+    
+    """
+    if rows == 0:
+        return
+    missing_portion = float(missing) / rows
     
     # Format as percentages for output
     missing_pct = int(round(100 * missing_portion))
@@ -663,7 +1721,7 @@ def assert_column_no_missing_values(table_name, column_name, missing_val_coding=
 
 
 def assert_column_values_in(table_name, column_name, values,
-                            missing_val_coding=np.nan):
+                            missing_val_coding=np.nan, rows=None):
     """
     Asserts that the values in a specified column correspond to a given list
     of acceptable values.
@@ -674,8 +1732,11 @@ def assert_column_values_in(table_name, column_name, values,
     column_name : str
     values : list or str
         List of values or single value to check column against
-    missing_val_coding : {0, -1, np.nan}, optional
+    missing_val_coding : {np.nan, int, str, set}, optional
         Value that indicates missing entries.
+    rows : tuple of int, optional
+        Positions of the first row to check and the row after the last, to check only a
+        range of the column's rows. Failure messages give positions in the whole column.
     
     Returns
     -------
@@ -683,22 +1744,127 @@ def assert_column_values_in(table_name, column_name, values,
     
     """
 
-    assert_column_can_be_generated(table_name, column_name)
-    
-    ds = get_column_or_index(table_name, column_name)
+    ds = get_column_or_index(table_name, column_name, rows)
     if type(values) != list:
         values = [values]
-    ds_child = get_column_or_index(table_name, column_name)
-    # strip missing values from dataset
-    ds = strip_missing_values(ds, missing_val_coding)
     
-    # Identify values in ds that are not in values list
-    diff = np.setdiff1d(ds.values, values)
-    if len(diff) != 0:
+    # Identify values in ds that are not in values list, ignoring missing values
+    skip = get_shared_missing_mask(table_name, column_name, ds, missing_val_coding)
+    i = find_first_not_in(ds, values, skip=skip, missing_val_coding=missing_val_coding)
+    if i is not None:
         msg = "Column {}.{} contains values that are not " \
               "in the acceptable values list: {}".format(table_name, column_name, 
                                                   str(values))
+        raise OrcaAssertionError(msg + describe_position(ds, i, rows))
+    return
+
+
+def assert_column_group_aggregate(table_name, column_name, parent_table_name,
+                                  parent_column_name, agg='sum', maximum=None,
+                                  minimum=None, key_column_name=None,
+                                  missing_val_coding=np.nan):
+    """
+    Asserts bounds on an aggregate of a column, grouped by the rows of a parent table
+    that it's linked to by a foreign key. This is useful for checking capacities and
+    other consistency rules across "broadcast" relationships.
+
+    For example, to assert that the households in each building don't have more persons
+    than the building's capacity, or that every zone has at least one job:
+
+        assert_column_group_aggregate('households', 'persons', 'buildings', 'building_id',
+                                      agg='sum', maximum='buildings.capacity')
+        assert_column_group_aggregate('jobs', 'zone_id', 'zones', 'zone_id',
+                                      agg='count', minimum=1)
+
+    Child keys are matched to the parent index with a single hash lookup and the groups
+    are accumulated with np.bincount, so the merged table is never materialized. Child
+    rows whose key is missing or not in the parent index are ignored; use
+    assert_column_is_foreign_key() to check for those. Parent rows without any child
+    rows have a sum or count of 0, and a mean that is treated as missing. Missing bounds
+    are not checked.
+
+    Parameters
+    ----------
+    table_name : str
+        Name of the child table.
+    column_name : str
+        Column to aggregate. Entries that are missing are left out of all aggregates.
+    parent_table_name : str
+    parent_column_name : str
+        Primary key of the parent table.
+    agg : {'sum', 'count', 'mean'}, optional
+    maximum, minimum : int, float, or str, optional
+        Bound for each group's aggregate, either a single value or a column of the parent
+        table with format 'parent_table_name.column_name'.
+    key_column_name : str, optional
+        Foreign key column in the child table. Defaults to parent_column_name.
+    missing_val_coding : {np.nan, int, str, set}, optional
+        Value that indicates missing entries in column_name.
+
+    Returns
+    -------
+    None
+
+    """
+    if agg not in ['sum', 'count', 'mean']:
+        msg = "Aggregation '%s' is not supported; use 'sum', 'count', or 'mean'" % agg
         raise OrcaAssertionError(msg)
+
+    if key_column_name is None:
+        key_column_name = parent_column_name
+
+    ds = get_column_or_index(table_name, column_name)
+    if agg != 'count':
+        check_numeric_dtype(column_name, ds.dtype)
+    keys = get_column_or_index(table_name, key_column_name)
+    assert_column_is_primary_key(parent_table_name, parent_column_name)
+    parent_idx = orca.get_table(parent_table_name).index
+
+    # Position of each child row in the parent index, or -1 if there's no match
+    present = ~get_missing_mask(table_name, column_name, ds, missing_val_coding)
+    codes = parent_idx.get_indexer(keys.values[present])
+    matched = codes >= 0
+    codes = codes[matched]
+
+    counts = np.bincount(codes, minlength=len(parent_idx))
+    if agg == 'count':
+        result = counts
+    else:
+        weights = ds.values[present][matched].astype('float64')
+        result = np.bincount(codes, weights=weights, minlength=len(parent_idx))
+        if agg == 'mean':
+            with np.errstate(invalid='ignore', divide='ignore'):
+                result = result / counts
+
+    for bound, label, characteristic in [(maximum, 'above', 'group_max'),
+                                         (minimum, 'below', 'group_min')]:
+        if bound is None:
+            continue
+
+        if isinstance(bound, str):
+            tab, col = split_column_reference(characteristic, bound)
+            if tab != parent_table_name:
+                msg = "Bound '%s' for column '%s' is not a column of table '%s'" \
+                        % (bound, column_name, parent_table_name)
+                raise OrcaAssertionError(msg)
+            bound_ds = get_column_or_index(tab, col)
+            check_numeric_dtype(col, bound_ds.dtype)
+            bound_values = bound_ds.values
+        else:
+            bound_values = np.full(len(parent_idx), bound)
+
+        with np.errstate(invalid='ignore'):
+            if label == 'above':
+                failed = result > bound_values
+            else:
+                failed = result < bound_values
+
+        if failed.any():
+            i = np.argmax(failed)
+            msg = "Column '%s' has %s of %s for %s '%s', %s limit of %s" \
+                    % (column_name, agg, str(result[i]), parent_column_name,
+                       str(parent_idx[i]), label, str(bound_values[i]))
+            raise OrcaAssertionError(msg)
     return
 
 
@@ -720,9 +1886,11 @@ def assert_injectable_not_registered(injectable_name):
     return
 
 
-def assert_injectable_can_be_generated(injectable_name):
+def assert_injectable_can_be_generated(injectable_name, max_seconds=None,
+                                       max_peak_mb=None, repeat=1, warmup=0):
     """
-    Can an _InjectableFuncWrapper be evaluated without errors?
+    Can an _InjectableFuncWrapper be evaluated without errors? Optionally, this also
+    asserts a performance budget for the function (see assert_generation_budget()).
     
     (The Orca documentation appears inconsistent, but orca.get_injectable() *does* attempt
     to evaluate wrapped functions, and returns the result.)
@@ -730,6 +1898,14 @@ def assert_injectable_can_be_generated(injectable_name):
     Parameters
     ----------
     injectable_name : str
+    max_seconds : int or float, optional
+        Maximum time to evaluate the injectable.
+    max_peak_mb : int or float, optional
+        Maximum memory allocated at peak while evaluating the injectable, in megabytes.
+    repeat : int, optional
+        Number of evaluations for each measurement, using the best result.
+    warmup : int, optional
+        Number of evaluations before measuring.
     
     Returns
     -------
@@ -745,6 +1921,10 @@ def assert_injectable_can_be_generated(injectable_name):
             # TODO: issues #3 log backtrace
             msg = "Injectable '%s' is registered but cannot be evaluated" % injectable_name
             raise OrcaAssertionError(msg)
+        
+        assert_generation_budget("Injectable '%s'" % injectable_name,
+                                 orca.get_raw_injectable(injectable_name),
+                                 max_seconds, max_peak_mb, repeat, warmup)
     return
 
 
@@ -805,3 +1985,751 @@ def assert_injectable_has_key(injectable_name, key):
         msg = "Injectable '%s' does not have key '%s'" % (injectable_name, key)
         raise OrcaAssertionError(msg)
     return
+
+
+def assert_column_strings(table_name, column_name, pattern=None, min_length=None,
+                          max_length=None, prefix_in=None, case=None,
+                          missing_val_coding=np.nan, rows=None):
+    """
+    Asserts characteristics of a string column, such as parcel numbers or census GEOIDs,
+    ignoring missing values. The column is converted to an Arrow array once, and each
+    characteristic is checked with vectorized pyarrow.compute functions rather than
+    element-wise Python calls. Categorical columns are checked using only the
+    categories that occur in the column. Requires pyarrow.
+    
+    Parameters
+    ----------
+    table_name : str
+    column_name : str
+    pattern : str, optional
+        Regular expression (RE2 syntax) that each entire value must match.
+    min_length, max_length : int, optional
+        Bounds on the number of characters in each value.
+    prefix_in : list or str, optional
+        Prefixes that each value must start with one of.
+    case : {'lower', 'upper'}, optional
+        Case that values must be normalized to.
+    missing_val_coding : {np.nan, int, str, set}, optional
+        Value that indicates missing entries.
+    rows : tuple of int, optional
+        Positions of the first row to check and the row after the last, to check only a
+        range of the column's rows. Failure messages give positions in the whole column.
+    
+    Returns
+    -------
+    None
+    
+    """
+    if pa is None:
+        msg = "String assertions for column '%s' require pyarrow, which is not installed" \
+                % column_name
+        raise OrcaAssertionError(msg)
+    
+    if case not in [None, 'lower', 'upper']:
+        msg = "Case '%s' is not supported; use 'lower' or 'upper'" % case
+        raise OrcaAssertionError(msg)
+    
+    ds = get_column_or_index(table_name, column_name, rows)
+    ds = ds[~get_missing_mask(table_name, column_name, ds, missing_val_coding)]
+
+    try:
+        arr = pa.array(ds, from_pandas=True)
+    except (pa.ArrowInvalid, pa.ArrowTypeError):
+        arr = None
+    
+    # Nothing to check if every entry is missing, in which case Arrow can't infer a type
+    if (arr is not None) and ((len(arr) == 0) or pa.types.is_null(arr.type)):
+        return
+    
+    # For categoricals, only the categories that occur need to be checked
+    if (arr is not None) and pa.types.is_dictionary(arr.type):
+        arr = arr.dictionary.take(pc.unique(arr.indices).drop_null())
+    
+    if (arr is None) or not (pa.types.is_string(arr.type) or 
+                             pa.types.is_large_string(arr.type)):
+        msg = "Column '%s' has values that are not strings" % column_name
+        raise OrcaAssertionError(msg)
+    
+    checks = []
+    if pattern is not None:
+        checks.append((pc.match_substring_regex(arr, '^(?:%s)$' % pattern),
+                       "do not match the pattern '%s'" % pattern))
+    
+    if (min_length is not None) or (max_length is not None):
+        lengths = pc.utf8_length(arr)
+        if min_length is not None:
+            checks.append((pc.greater_equal(lengths, min_length),
+                           "are shorter than %s characters" % str(min_length)))
+        if max_length is not None:
+            checks.append((pc.less_equal(lengths, max_length),
+                           "are longer than %s characters" % str(max_length)))
+    
+    if prefix_in is not None:
+        if type(prefix_in) != list:
+            prefix_in = [prefix_in]
+        has_prefix = pc.starts_with(arr, pattern=prefix_in[0])
+        for prefix in prefix_in[1:]:
+            has_prefix = pc.or_(has_prefix, pc.starts_with(arr, pattern=prefix))
+        checks.append((has_prefix, 
+                       "do not start with any of the prefixes %s" % str(prefix_in)))
+    
+    if case is not None:
+        normalized = pc.utf8_lower(arr) if case == 'lower' else pc.utf8_upper(arr)
+        checks.append((pc.equal(arr, normalized), "are not %s case" % case))
+    
+    for passed, description in checks:
+        failed = arr.filter(pc.invert(pc.fill_null(passed, True)))
+        if len(failed) != 0:
+            msg = "Column '%s' has values that %s, e.g. '%s'" \
+                    % (column_name, description, failed[0].as_py())
+            raise OrcaAssertionError(msg)
+    return
+
+
+"""
+#########
+SNAPSHOTS
+#########
+
+A snapshot saves every column that an OrcaSpec refers to, so that the spec can be
+asserted again later (for example while iterating on the spec, or debugging a failure)
+without re-running the pipeline that generated the data. Each column is stored as a .npy
+file that is memory-mapped when it's loaded, and a 'manifest.json' file describes the
+layout. Columns with object or extension dtypes can't be memory-mapped, so they are
+pickled into the .npy file and loaded into memory instead.
+
+"""
+
+
+def get_spec_columns(o_spec):
+    """
+    List the columns that the assertions in a spec refer to, including the parent table
+    columns named by 'foreign_key' and 'group_by' characteristics.
+    
+    Parameters
+    ----------
+    o_spec : orca_test.OrcaSpec
+    
+    Returns
+    -------
+    columns : dict
+        Keys are table names and values are lists of column names, in the order that
+        they first appear in the spec.
+    
+    """
+    columns = {}
+    
+    def add(table_name, column_name=None):
+        cols = columns.setdefault(table_name, [])
+        if (column_name is not None) and (column_name not in cols):
+            cols.append(column_name)
+    
+    for t_spec in o_spec.tables:
+        add(t_spec.name)
+        for c_spec in t_spec.columns:
+            add(t_spec.name, c_spec.name)
+            props = c_spec.properties
+            
+            for k in ['foreign_key', 'group_by']:
+                if k in props:
+                    add(*split_column_reference(k, props[k]))
+            
+            if 'group_by' in props:
+                parent_table_name, parent_column_name = \
+                        split_column_reference('group_by', props['group_by'])
+                add(t_spec.name, props.get('group_key', parent_column_name))
+                for k in ['group_max', 'group_min']:
+                    if isinstance(props.get(k), str):
+                        add(*split_column_reference(k, props[k]))
+    return columns
+
+
+def _save_snapshot_array(path, file_name, series, name):
+    """
+    Helper function. Saves a column's values as a .npy file and returns its entry for the
+    manifest. The name is passed separately, because the Series returned by a column
+    function is often named after a different column.
+    
+    """
+    values = np.asarray(series)
+    np.save(os.path.join(path, file_name), values, allow_pickle=values.dtype.hasobject)
+    return {'name': name,
+            'file': file_name,
+            'dtype': str(series.dtype),
+            'mmap': not values.dtype.hasobject}
+
+
+def _load_snapshot_array(path, entry):
+    """
+    Helper function. Loads a column saved by _save_snapshot_array() as a pd.Series,
+    memory-mapping it when possible.
+    
+    """
+    file_path = os.path.join(path, entry['file'])
+    if entry['mmap']:
+        values = np.load(file_path, mmap_mode='r')
+    else:
+        values = np.load(file_path, allow_pickle=True)
+    
+    series = pd.Series(values, name=entry['name'], copy=False)
+    if str(series.dtype) != entry['dtype']:
+        # Restores categorical and other extension dtypes
+        series = series.astype(entry['dtype'])
+    return series
+
+
+def write_spec_snapshot(o_spec, path):
+    """
+    Save every registered column that a spec refers to, along with the index of each of
+    those tables and the value of each injectable in the spec, so that the spec can be
+    asserted later from the snapshot. Tables, columns, and injectables that are not
+    registered or cannot be generated are left out, and assertions about them will fail
+    when the snapshot is checked.
+    
+    Parameters
+    ----------
+    o_spec : orca_test.OrcaSpec
+    path : str
+        Directory to write to. It will be created if it doesn't exist, and files from an
+        earlier snapshot will be overwritten.
+    
+    Returns
+    -------
+    None
+    
+    """
+    if not os.path.exists(path):
+        os.makedirs(path)
+    
+    manifest = {'spec': o_spec.name, 'tables': {}, 'injectables': []}
+    
+    for table_name, column_names in get_spec_columns(o_spec).items():
+        try:
+            assert_table_can_be_generated(table_name)
+        except OrcaAssertionError:
+            continue
+        
+        t = orca.get_table(table_name)
+        table_dir = 'table_%d' % len(manifest['tables'])
+        if not os.path.exists(os.path.join(path, table_dir)):
+            os.makedirs(os.path.join(path, table_dir))
+        
+        # File names are numbered, because column names aren't always valid file names
+        index = []
+        for i, name in enumerate(t.index.names):
+            level = pd.Series(t.index.get_level_values(i))
+            index.append(_save_snapshot_array(path, '%s/index_%d.npy' % (table_dir, i),
+                                              level, name))
+        columns = []
+        for name in column_names:
+            if (name in t.index.names) or (name not in t.columns):
+                continue
+            try:
+                ds = t.get_column(name)
+            except:
+                continue
+            columns.append(_save_snapshot_array(path, '%s/column_%d.npy' 
+                                                % (table_dir, len(columns)), ds, name))
+        
+        manifest['tables'][table_name] = {'index': index, 'columns': columns}
+    
+    injectables = {}
+    for i_spec in o_spec.injectables:
+        try:
+            assert_injectable_can_be_generated(i_spec.name)
+        except OrcaAssertionError:
+            continue
+        inj = orca.get_injectable(i_spec.name)
+        try:
+            _ = pickle.dumps(inj)
+        except:
+            continue
+        injectables[i_spec.name] = inj
+    
+    with open(os.path.join(path, 'injectables.pkl'), 'wb') as f:
+        pickle.dump(injectables, f)
+    manifest['injectables'] = sorted(injectables.keys())
+    
+    with open(os.path.join(path, 'manifest.json'), 'w') as f:
+        json.dump(manifest, f, indent=2)
+    return
+
+
+def load_spec_snapshot(path):
+    """
+    Register the tables and injectables from a snapshot with orca, replacing any that are
+    already registered with the same names. Numeric columns are memory-mapped rather than
+    read into memory. This is meant to be run in a fresh session, in place of the code
+    that normally registers the orca tables.
+    
+    Parameters
+    ----------
+    path : str
+        Directory written by write_spec_snapshot().
+    
+    Returns
+    -------
+    manifest : dict
+    
+    """
+    with open(os.path.join(path, 'manifest.json')) as f:
+        manifest = json.load(f)
+    
+    for table_name, entries in manifest['tables'].items():
+        levels = [_load_snapshot_array(path, e) for e in entries['index']]
+        if len(levels) == 1:
+            index = pd.Index(levels[0], name=levels[0].name, copy=False)
+        else:
+            index = pd.MultiIndex.from_arrays(levels)
+        
+        columns = [_load_snapshot_array(path, e) for e in entries['columns']]
+        df = pd.DataFrame({ds.name: ds.values for ds in columns}, index=index, copy=False,
+                          columns=[ds.name for ds in columns])
+        orca.add_table(table_name, df)
+    
+    with open(os.path.join(path, 'injectables.pkl'), 'rb') as f:
+        for name, value in pickle.load(f).items():
+            orca.add_injectable(name, value)
+    return manifest
+
+
+"""
+###############
+PARQUET FOOTERS
+###############
+
+For tables that are loaded from Parquet files, some assertions can be answered from the
+statistics in the file's footer (min, max, and null count for each row group), without
+reading the data or generating the orca table. These functions use the statistics when
+they are conclusive, and read a single column of only the row groups where they are not:
+for example, when a row group's maximum equals the missing_val_coding, or when the file
+was written without statistics. Requires pyarrow.
+
+Parquet statistics don't count floating-point NaN values, which some writers store
+instead of nulls, so missing values in float columns are always counted by reading the
+column.
+
+"""
+
+
+def _open_parquet_column(path, column_name, numeric=False):
+    """
+    Helper function. Opens a Parquet file and returns it along with the position of a
+    column in its row groups.
+    
+    """
+    if pa is None:
+        msg = "Parquet assertions for column '%s' require pyarrow, which is not installed" \
+                % column_name
+        raise OrcaAssertionError(msg)
+    
+    pf = pq.ParquetFile(path)
+    if pf.metadata.num_row_groups == 0:
+        return pf, None
+    
+    rg = pf.metadata.row_group(0)
+    positions = [j for j in range(rg.num_columns) 
+                 if rg.column(j).path_in_schema == column_name]
+    if len(positions) == 0:
+        msg = "Column '%s' is not in Parquet file '%s'" % (column_name, path)
+        raise OrcaAssertionError(msg)
+    
+    dtype = pf.schema_arrow.field(column_name).type
+    if numeric and not (pa.types.is_integer(dtype) or pa.types.is_floating(dtype)):
+        msg = "Column '%s' has type '%s' (not numeric)" % (column_name, dtype)
+        raise OrcaAssertionError(msg)
+    return pf, positions[0]
+
+
+def _row_group_statistics(pf, i, position):
+    """
+    Helper function. Returns a row group's statistics for a column, or None if the file
+    doesn't have min and max statistics for it.
+    
+    """
+    stats = pf.metadata.row_group(i).column(position).statistics
+    if (stats is None) or not stats.has_min_max:
+        return None
+    return stats
+
+
+def _read_row_group(pf, i, column_name):
+    """
+    Helper function. Reads a single column of a row group as a pd.Series.
+    
+    """
+    return pf.read_row_group(i, columns=[column_name]).column(0).to_pandas()
+
+
+def _parquet_column_extreme(path, column_name, bound, missing_val_coding, largest):
+    """
+    Helper function. Returns the maximum (or minimum) of a column, ignoring missing
+    values, or None if all values are missing. Row groups are only read if their
+    statistics can't show whether the bound is met.
+    
+    """
+    pf, position = _open_parquet_column(path, column_name, numeric=True)
+    extreme = max if largest else min
+    codings = split_missing_val_coding(missing_val_coding)[1]
+    values = []
+    
+    for i in range(pf.metadata.num_row_groups):
+        stats = _row_group_statistics(pf, i, position)
+        if stats is not None:
+            value = stats.max if largest else stats.min
+            
+            # The statistic is a real value unless it's the missing_val_coding, in which
+            # case it's still good enough as a limit if it meets the bound
+            meets_bound = (value <= bound) if largest else (value >= bound)
+            if (value not in codings) or meets_bound:
+                values.append(value)
+                continue
+        
+        ds = strip_missing_values(_read_row_group(pf, i, column_name), missing_val_coding)
+        if len(ds) > 0:
+            values.append(ds.max() if largest else ds.min())
+    
+    if len(values) == 0:
+        return None
+    return extreme(values)
+
+
+def _parquet_missing_count(pf, position, column_name, missing_val_coding):
+    """
+    Helper function. Counts a column's missing values, reading only the row groups whose
+    statistics are not conclusive.
+    
+    """
+    is_float = pa.types.is_floating(pf.schema_arrow.field(column_name).type)
+    nulls, values = split_missing_val_coding(missing_val_coding)
+    count = 0
+
+    for i in range(pf.metadata.num_row_groups):
+        stats = pf.metadata.row_group(i).column(position).statistics
+        conclusive = True
+        null_count = 0
+
+        if nulls:
+            if (stats is not None) and stats.has_null_count and not is_float:
+                null_count = stats.null_count
+            else:
+                conclusive = False
+
+        # If the codings are outside the range of values, no entries use them
+        if len(values) > 0:
+            stats = _row_group_statistics(pf, i, position)
+            try:
+                if (stats is None) or any(stats.min <= v <= stats.max for v in values):
+                    conclusive = False
+            except TypeError:
+                conclusive = False
+
+        if conclusive:
+            count += null_count
+            continue
+
+        ds = _read_row_group(pf, i, column_name)
+        count += int(missing_values_mask(ds, missing_val_coding).sum())
+    return count
+
+
+def assert_parquet_column_max(path, column_name, maximum, missing_val_coding=np.nan):
+    """
+    Asserts a maximum value for a numeric column of a Parquet file, ignoring missing
+    values. Equivalent to assert_column_max(), but uses the file's statistics.
+    
+    Parameters
+    ----------
+    path : str
+    column_name : str
+    maximum : int or float
+    missing_val_coding : {np.nan, int, set}, optional
+        Value that indicates missing entries.
+    
+    Returns
+    -------
+    None
+    
+    """
+    value = _parquet_column_extreme(path, column_name, maximum, missing_val_coding, True)
+    
+    if (value is not None) and not value <= maximum:
+        msg = "Column '%s' has values above the maximum of %s, e.g. %s" \
+                % (column_name, str(maximum), str(value))
+        raise OrcaAssertionError(msg)
+    return
+
+
+def assert_parquet_column_min(path, column_name, minimum, missing_val_coding=np.nan):
+    """
+    Asserts a minimum value for a numeric column of a Parquet file, ignoring missing
+    values. Equivalent to assert_column_min(), but uses the file's statistics.
+    
+    Parameters
+    ----------
+    path : str
+    column_name : str
+    minimum : int or float
+    missing_val_coding : {np.nan, int, set}, optional
+        Value that indicates missing entries.
+    
+    Returns
+    -------
+    None
+    
+    """
+    value = _parquet_column_extreme(path, column_name, minimum, missing_val_coding, False)
+    
+    if (value is not None) and not value >= minimum:
+        msg = "Column '%s' has values below the minimum of %s, e.g. %s" \
+                % (column_name, str(minimum), str(value))
+        raise OrcaAssertionError(msg)
+    return
+
+
+def assert_parquet_column_max_portion_missing(path, column_name, portion,
+                                              missing_val_coding=np.nan):
+    """
+    Assert the maximum portion of a Parquet column's entries that may be missing. 
+    Equivalent to assert_column_max_portion_missing(), but uses the file's statistics.
+    
+    Parameters
+    ----------
+    path : str
+    column_name : str
+    portion : float from 0 to 1
+        Maximum portion of entries that may be missing.
+    missing_val_coding : {np.nan, int, set}, optional
+        Value that indicates missing entries.
+    
+    Returns
+    -------
+    None
+    
+    """
+    pf, position = _open_parquet_column(path, column_name)
+    if pf.metadata.num_rows == 0:
+        return
+    
+    missing = _parquet_missing_count(pf, position, column_name, missing_val_coding)
+    assert_portion_missing(column_name, missing, pf.metadata.num_rows, portion)
+    return
+
+
+def assert_parquet_column_missing_value_coding(path, column_name, missing_val_coding):
+    """
+    Asserts that a Parquet column's missing entries are all coded with a particular
+    value. Equivalent to assert_column_missing_value_coding(), but uses the file's
+    statistics.
+    
+    Parameters
+    ----------
+    path : str
+    column_name : str
+    missing_val_coding : {np.nan, int, set}
+        Value that indicates missing entries.
+    
+    Returns
+    -------
+    None
+    
+    """
+    pf, position = _open_parquet_column(path, column_name)
+    if split_missing_val_coding(missing_val_coding)[0]:
+        return
+    
+    if _parquet_missing_count(pf, position, column_name, np.nan) != 0:
+        msg = "Column '%s' has null entries that are not coded as %s" \
+                % (column_name, str(missing_val_coding))
+        raise OrcaAssertionError(msg)
+    return
+
+
+"""
+##########################
+CHANGES BETWEEN ITERATIONS
+##########################
+
+These assertions bound how much a column changes between the times they're checked, for
+example between iterations of a simulation. Each time one of them runs, it compares the
+column to a compact summary saved by the same assertion the previous time, and then saves
+a new summary. The first check of a column always passes. Summaries are kept in memory
+for the rest of the session, or until clear_column_summaries() is called.
+
+Depending on the assertion, a summary holds the column's sum, mean, and count, its sorted
+unique values, or its sorted index with a 32-bit hash of each row's value, rather than a
+copy of the table.
+
+"""
+
+
+_column_summaries = {}
+
+
+def clear_column_summaries():
+    """
+    Forget the summaries saved by assertions about changes between iterations, so that
+    the next check of each column passes and starts over.
+    
+    """
+    _column_summaries.clear()
+    return
+
+
+def _swap_column_summary(key, summary):
+    """
+    Helper function. Saves a summary and returns the one it replaces, or None.
+    
+    """
+    previous = _column_summaries.get(key)
+    _column_summaries[key] = summary
+    return previous
+
+
+def assert_column_max_change(table_name, column_name, stat, max_change,
+                             missing_val_coding=np.nan):
+    """
+    Asserts a limit on the relative change in a numeric column's sum or mean since the
+    last time this was checked, ignoring missing values.
+    
+    Parameters
+    ----------
+    table_name : str
+    column_name : str
+    stat : {'sum', 'mean'}
+    max_change : float
+        Maximum change as a portion of the previous value, for example 0.1 for 10%.
+    missing_val_coding : {np.nan, int, str, set}, optional
+        Value that indicates missing entries.
+    
+    Returns
+    -------
+    None
+    
+    """
+    if stat not in ['sum', 'mean']:
+        msg = "Statistic '%s' is not supported; use 'sum' or 'mean'" % stat
+        raise OrcaAssertionError(msg)
+    
+    ds = get_column_or_index(table_name, column_name)
+    check_numeric_dtype(column_name, ds.dtype)
+    ds = ds[~get_missing_mask(table_name, column_name, ds, missing_val_coding)]
+    current = ds.sum() if stat == 'sum' else ds.mean()
+    
+    previous = _swap_column_summary((table_name, column_name, 'max_change_' + stat),
+                                    current)
+    if (previous is None) or pd.isnull(previous) or pd.isnull(current):
+        return
+    
+    if previous == 0:
+        change = 0.0 if current == 0 else np.inf
+    else:
+        change = abs(float(current - previous) / previous)
+    
+    if not change <= max_change:
+        msg = "Column '%s' %s changed by %s%% since the last check (from %s to %s), " \
+              "above limit of %s%%" % (column_name, stat, int(round(100 * change)),
+                                       str(previous), str(current),
+                                       int(round(100 * max_change)))
+        raise OrcaAssertionError(msg)
+    return
+
+
+def assert_column_max_portion_changed(table_name, column_name, portion):
+    """
+    Asserts a limit on the portion of rows whose value in a column changed since the last
+    time this was checked. Rows are matched by the table's index, which must be unique,
+    and rows that were added or removed don't count as changed.
+    
+    The summary saved for the next check is a 32-bit hash of each row's value (4 bytes
+    per row), plus the sorted index: nothing more for a RangeIndex, 4 bytes per row for
+    integer indexes whose values fit in 32 bits, and 8 bytes per row otherwise. A change
+    is missed if the old and new values happen to have the same hash, which has a
+    probability of about one in four billion.
+    
+    Parameters
+    ----------
+    table_name : str
+    column_name : str
+    portion : float from 0 to 1
+        Maximum portion of rows that may have changed.
+    
+    Returns
+    -------
+    None
+    
+    """
+    ds = get_column_or_index(table_name, column_name)
+    
+    if not ds.index.is_unique:
+        msg = "Table '%s' has an index with duplicate values, so rows of column '%s' " \
+              "can't be matched between checks" % (table_name, column_name)
+        raise OrcaAssertionError(msg)
+    
+    hashes = pd.util.hash_pandas_object(ds, index=False).values.astype(np.uint32)
+    keys = ds.index
+    if not (isinstance(keys, pd.RangeIndex) and keys.step > 0):
+        order = np.argsort(keys.values, kind='mergesort')
+        keys, hashes = keys.values[order], hashes[order]
+        
+        int32 = np.iinfo(np.int32)
+        if (keys.dtype.kind in 'iu') and (len(keys) > 0) and \
+                (int32.min <= keys[0]) and (keys[-1] <= int32.max):
+            keys = keys.astype(np.int32)
+    current = (keys, hashes)
+    
+    previous = _swap_column_summary((table_name, column_name, 'max_portion_changed'),
+                                    current)
+    if previous is None:
+        return
+    
+    if isinstance(previous[0], pd.RangeIndex) and previous[0].equals(current[0]):
+        old, new = previous[1], current[1]
+    else:
+        common, i_prev, i_cur = np.intersect1d(np.asarray(previous[0]),
+                                               np.asarray(current[0]), assume_unique=True,
+                                               return_indices=True)
+        old, new = previous[1][i_prev], current[1][i_cur]
+    if len(old) == 0:
+        return
+    
+    changed = float(np.sum(old != new)) / len(old)
+    if not changed <= portion:
+        msg = "Column '%s' changed in %s%% of rows since the last check, above limit of " \
+              "%s%%" % (column_name, int(round(100 * changed)), int(round(100 * portion)))
+        raise OrcaAssertionError(msg)
+    return
+
+
+def assert_column_only_grows(table_name, column_name, missing_val_coding=np.nan):
+    """
+    Asserts that every value that was in a column the last time this was checked is
+    still there, ignoring missing values. For an index, this means that rows are only
+    added. The summary saved for the next check is the column's sorted unique values.
+    
+    Parameters
+    ----------
+    table_name : str
+    column_name : str
+    missing_val_coding : {np.nan, int, str, set}, optional
+        Value that indicates missing entries.
+    
+    Returns
+    -------
+    None
+    
+    """
+    ds = get_column_or_index(table_name, column_name)
+    current = np.unique(ds.values[~get_missing_mask(table_name, column_name, ds,
+                                                    missing_val_coding)])
+    
+    previous = _swap_column_summary((table_name, column_name, 'only_grows'), current)
+    if previous is None:
+        return
+    
+    removed = np.setdiff1d(previous, current, assume_unique=True)
+    if len(removed) != 0:
+        msg = "Column '%s' no longer has %d values that it had at the last check, " \
+              "e.g. %s" % (column_name, len(removed), str(removed[0]))
+        raise OrcaAssertionError(msg)
+    return
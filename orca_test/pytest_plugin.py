@@ -0,0 +1,87 @@
+# Orca_test
+# Copyright (c) 2016 UrbanSim Inc.
+# See full license in LICENSE
+
+"""
+A pytest plugin for asserting specs, which is registered with pytest when orca_test is
+installed. Any OrcaSpec defined at the top level of a test module is collected as a set of
+test items, one per table, column, or injectable characteristic, so that every failing
+characteristic is reported in a single run. For example, a file named 'test_specs.py' containing
+
+    spec = OrcaSpec('baus', TableSpec('buildings', ColumnSpec('price', min=0)))
+
+produces the item 'test_specs.py::spec::buildings.price[min]'.
+
+Tables are generated once per session: before the first item of a spec runs, caching is
+turned on for each table the spec refers to that is registered as a function, and for the
+tables' function columns. The original settings are restored when the session finishes. Items are marked with
+an xdist group for their table, so that 'pytest -n 4 --dist loadgroup' shards them across
+pytest-xdist workers by table, and each table is only generated by one worker.
+
+"""
+
+import pytest
+
+from .orca_test import (OrcaSpec, OrcaAssertionError, SessionTableCache, get_spec_columns,
+                        split_spec)
+
+
+_table_cache = SessionTableCache()
+
+
+class OrcaSpecCollector(pytest.Collector):
+    """
+    Collects the characteristics of an OrcaSpec as test items.
+
+    """
+    def __init__(self, name, parent, o_spec):
+        super(OrcaSpecCollector, self).__init__(name, parent)
+        self.o_spec = o_spec
+        self.table_names = list(get_spec_columns(o_spec).keys())
+
+    def collect(self):
+        for name, table_name, func in split_spec(self.o_spec):
+            item = OrcaSpecItem.from_parent(self, name=name, table_name=table_name,
+                                            func=func)
+            item.add_marker(pytest.mark.xdist_group(table_name or '__injectables__'))
+            yield item
+
+
+class OrcaSpecItem(pytest.Item):
+    """
+    Asserts a single characteristic from an OrcaSpec.
+
+    """
+    def __init__(self, name, parent, table_name, func):
+        super(OrcaSpecItem, self).__init__(name, parent)
+        self.table_name = table_name
+        self.func = func
+
+    def setup(self):
+        for table_name in self.parent.table_names:
+            _table_cache.enable(table_name)
+
+    def runtest(self):
+        self.func()
+
+    def repr_failure(self, excinfo):
+        if excinfo.errisinstance(OrcaAssertionError):
+            return "%s: %s" % (self.name, str(excinfo.value))
+        return super(OrcaSpecItem, self).repr_failure(excinfo)
+
+    def reportinfo(self):
+        return self.path, None, '%s::%s' % (self.parent.name, self.name)
+
+
+def pytest_configure(config):
+    config.addinivalue_line('markers',
+        'xdist_group(name): group of orca_test items that pytest-xdist runs on one worker')
+
+
+def pytest_pycollect_makeitem(collector, name, obj):
+    if isinstance(obj, OrcaSpec):
+        return OrcaSpecCollector.from_parent(collector, name=name, o_spec=obj)
+
+
+def pytest_sessionfinish(session):
+    _table_cache.restore()
@@ -0,0 +1,243 @@
+# Orca_test
+# Copyright (c) 2016 UrbanSim Inc.
+# See full license in LICENSE
+
+"""
+A long-lived validation server, started with 'orca-test serve'. It imports the modules
+that register an orca model's tables, columns, and injectables once, keeps generated
+tables cached in memory, and asserts specs on request, so that repeated checks don't pay
+for Python startup, imports, and base-year loading each time.
+
+Requests are JSON objects sent by POST to http://127.0.0.1:<port>/validate:
+
+    {"spec": "specs/baus.py",    # Python file defining OrcaSpecs, or 'file.py:name'
+     "tables": ["buildings"],    # optional subset of tables to assert
+     "mode": "all"}              # 'fail_fast' (default) or 'all'
+
+The spec file is re-run for each request, so edits to it are picked up. The response
+lists the result of each characteristic that was asserted:
+
+    {"passed": false,
+     "results": [{"spec": "baus", "name": "buildings.price[min]", "table": "buildings",
+                  "passed": false, "message": "Column 'price' has values below ..."}]}
+
+POST /clear-cache clears orca's cache, so that tables are regenerated on the next request.
+
+Requests are not authenticated and can run any Python file, so the server only binds to
+loopback addresses.
+
+"""
+
+import argparse
+import importlib
+import json
+import runpy
+import socket
+import sys
+
+from http.server import BaseHTTPRequestHandler, HTTPServer
+
+import orca
+
+from .orca_test import OrcaSpec, OrcaAssertionError, SessionTableCache, split_spec
+
+
+def load_specs(path):
+    """
+    Run a Python file and return the OrcaSpecs defined at its top level.
+
+    Parameters
+    ----------
+    path : str
+        Path to the file, optionally followed by ':name' to select a single spec.
+
+    Returns
+    -------
+    specs : list of orca_test.OrcaSpec
+
+    """
+    name = None
+    if ':' in path:
+        path, name = path.rsplit(':', 1)
+
+    namespace = runpy.run_path(path)
+    if name is not None:
+        return [namespace[name]]
+    return [v for v in namespace.values() if isinstance(v, OrcaSpec)]
+
+
+def load_models(models):
+    """
+    Import the modules that register an orca model's tables, columns, and injectables.
+
+    Parameters
+    ----------
+    models : list of str
+        Module names or paths to Python files, imported in order.
+
+    Returns
+    -------
+    None
+
+    """
+    for model in models:
+        if model.endswith('.py'):
+            runpy.run_path(model, run_name='__orca_model__')
+        else:
+            importlib.import_module(model)
+
+
+def validate_specs(specs, tables=None, mode='fail_fast'):
+    """
+    Assert the characteristics of a list of specs one at a time, recording the results
+    instead of raising an OrcaAssertionError.
+
+    Parameters
+    ----------
+    specs : list of orca_test.OrcaSpec
+    tables : list of str, optional
+        Only assert characteristics of these tables (injectables are skipped).
+    mode : {'fail_fast', 'all'}, optional
+        Whether to stop at the first failure, or assert every characteristic.
+
+    Returns
+    -------
+    results : dict
+
+    """
+    results = []
+    for o_spec in specs:
+        for name, table_name, func in split_spec(o_spec):
+            if (tables is not None) and (table_name not in tables):
+                continue
+
+            result = {'spec': o_spec.name, 'name': name, 'table': table_name,
+                      'passed': True, 'message': None}
+            try:
+                func()
+            except OrcaAssertionError as e:
+                result.update(passed=False, message=str(e))
+            except Exception as e:
+                result.update(passed=False, message='%s: %s' % (type(e).__name__, str(e)))
+            results.append(result)
+
+            if (mode == 'fail_fast') and not result['passed']:
+                return {'passed': False, 'results': results}
+
+    return {'passed': all(r['passed'] for r in results), 'results': results}
+
+
+class ValidationHandler(BaseHTTPRequestHandler):
+
+    def do_POST(self):
+        try:
+            if self.path == '/validate':
+                length = int(self.headers.get('Content-Length', 0))
+                request = json.loads(self.rfile.read(length).decode('utf-8'))
+                mode = request.get('mode', 'fail_fast')
+                if mode not in ['fail_fast', 'all']:
+                    raise ValueError("Mode '%s' is not 'fail_fast' or 'all'" % mode)
+
+                specs = load_specs(request['spec'])
+                for table_name in orca.list_tables():
+                    self.server.table_cache.enable(table_name)
+                response = validate_specs(specs, request.get('tables'), mode)
+
+            elif self.path == '/clear-cache':
+                orca.clear_cache()
+                response = {}
+
+            else:
+                self.send_error(404)
+                return
+
+        except Exception as e:
+            self.send_json(400, {'error': '%s: %s' % (type(e).__name__, str(e))})
+            return
+
+        self.send_json(200, response)
+
+    def send_json(self, status, response):
+        body = json.dumps(response).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+def serve(models, host='127.0.0.1', port=8765):
+    """
+    Import the modules that register an orca model, then handle validation requests
+    until interrupted. Requests are handled one at a time, because orca's registry and
+    cache are not thread-safe.
+
+    Parameters
+    ----------
+    models : list of str
+        Module names or paths to Python files, imported in order.
+    host : str, optional
+        Must be a loopback address, because requests can run any Python file and are
+        not authenticated.
+    port : int, optional
+
+    Returns
+    -------
+    None
+
+    """
+    if not socket.gethostbyname(host).startswith('127.'):
+        raise ValueError("Host '%s' is not a loopback address; the validation server "
+                         "runs spec files without authentication" % host)
+
+    load_models(models)
+    server = HTTPServer((host, port), ValidationHandler)
+    server.table_cache = SessionTableCache()
+    print("orca_test is serving on http://%s:%d" % (host, port))
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        server.table_cache.restore()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='orca-test')
+    subparsers = parser.add_subparsers(dest='command')
+
+    serve_parser = subparsers.add_parser('serve', help='start a validation server')
+    serve_parser.add_argument('models', nargs='+', help=
+            'modules or Python files that register the orca tables, columns, and '
+            'injectables')
+    serve_parser.add_argument('--host', default='127.0.0.1', help=
+            'loopback address to bind to')
+    serve_parser.add_argument('--port', type=int, default=8765)
+
+    validate_parser = subparsers.add_parser('validate',
+            help='assert specs with worker processes')
+    validate_parser.add_argument('spec', help=
+            "Python file defining OrcaSpecs, or 'file.py:name'")
+    validate_parser.add_argument('models', nargs='+', help=
+            'modules or Python files that register the orca tables, columns, and '
+            'injectables')
+    validate_parser.add_argument('--workers', type=int, default=2)
+    validate_parser.add_argument('--row-shards', type=int, default=None, help=
+            'number of row ranges to split column characteristics into')
+    validate_parser.add_argument('--tables', nargs='+', default=None)
+
+    args = parser.parse_args(argv)
+    if args.command == 'serve':
+        sys.path.insert(0, '')
+        serve(args.models, args.host, args.port)
+    elif args.command == 'validate':
+        # The coordinator imports this module, so it's imported here
+        from .coordinator import validate_sharded
+        sys.path.insert(0, '')
+        response = validate_sharded(load_specs(args.spec), args.models, args.workers,
+                                    args.row_shards, args.tables)
+        print(json.dumps(response, indent=2))
+        sys.exit(0 if response['passed'] else 1)
+    else:
+        parser.print_help()
@@ -0,0 +1,100 @@
+# Orca_test
+# Copyright (c) 2016 UrbanSim Inc.
+# See full license in LICENSE
+
+"""
+This is an informal test of the coordinator. It asserts specs for the model in
+integration_model.py with worker processes, splitting columns into row ranges.
+
+"""
+
+import os
+import tempfile
+
+from orca_test import OrcaSpec, TableSpec, ColumnSpec
+from orca_test.coordinator import validate_sharded
+
+
+def main():
+    spec = OrcaSpec('spec',
+        TableSpec('buildings',
+            ColumnSpec('building_id', primary_key=True),
+            ColumnSpec('zone_id', foreign_key='zones.zone_id'),
+            ColumnSpec('price', min=0, max_portion_missing=0.02),
+            ColumnSpec('units', min=0),
+            ColumnSpec('price_per_unit', numeric=True, max_portion_missing=0.01)),
+        TableSpec('zones',
+            ColumnSpec('zone_id', primary_key=True)))
+
+    # Workers start with 'spawn', so they import the model and generate the tables
+    # themselves
+    response = validate_sharded([spec], ['integration_model.py'], workers=2, row_shards=4)
+    print(response)
+    results = dict((r['name'], r) for r in response['results'])
+    assert not response['passed']
+    assert results['buildings.building_id[primary_key]']['passed']
+    assert results['buildings.zone_id[foreign_key]']['passed']
+    assert results['buildings.price[min]']['passed']
+
+    # Counts of missing values are added up over the row ranges: 2 of 100 prices are
+    # missing, and so are the computed values that depend on them
+    assert results['buildings.price[max_portion_missing]']['passed']
+    assert '2% missing' in results['buildings.price_per_unit[max_portion_missing]']['message']
+
+    # Failures in a row range give the position in the whole column
+    message = results['buildings.units[min]']['message']
+    assert message == "Column 'units' has values below the minimum of 0, " \
+                      "e.g. -1 in row 97 (index 98)"
+    passed = [r['passed'] for r in response['results']]
+    assert [r['name'] for r in response['results']] == [
+        'buildings.building_id[primary_key]', 'buildings.zone_id[foreign_key]',
+        'buildings.price[min]', 'buildings.price[max_portion_missing]',
+        'buildings.units[min]', 'buildings.price_per_unit[numeric]',
+        'buildings.price_per_unit[max_portion_missing]', 'zones.zone_id[primary_key]']
+
+    # Without row ranges, each table's characteristics are one unit, so a table is
+    # generated once for its own unit even with more workers than tables, and otherwise
+    # only for units of tables with foreign keys to it
+    log_path = os.path.join(tempfile.mkdtemp(), 'generated.txt')
+    os.environ['ORCA_TEST_GENERATION_LOG'] = log_path
+    response = validate_sharded([spec], ['integration_model.py'], workers=3)
+    del os.environ['ORCA_TEST_GENERATION_LOG']
+    with open(log_path) as f:
+        generated = f.read().split()
+    os.remove(log_path)
+    os.rmdir(os.path.dirname(log_path))
+    print(generated)
+    assert sorted(generated) == ['buildings', 'zones', 'zones']
+    assert [r['passed'] for r in response['results']] == passed
+
+    # Items with the same name in different specs are kept apart
+    spec_a = OrcaSpec('a', TableSpec('buildings', ColumnSpec('units', min=0)))
+    spec_b = OrcaSpec('b', TableSpec('buildings', ColumnSpec('units', min=-1)))
+    response = validate_sharded([spec_a, spec_b], ['integration_model.py'], row_shards=2)
+    print(response)
+    assert [(r['spec'], r['passed']) for r in response['results']] == \
+           [('a', False), ('b', True)]
+
+    # Characteristics that compare iterations can't be asserted by new workers
+    spec = OrcaSpec('spec',
+        TableSpec('buildings',
+            ColumnSpec('units', only_grows=True)))
+    try:
+        validate_sharded([spec], ['integration_model.py'])
+        raise AssertionError('Change characteristic was sent to the workers')
+    except ValueError as e:
+        print(e)
+
+    # Models that can't be loaded stop the validation
+    spec = OrcaSpec('spec',
+        TableSpec('zones',
+            ColumnSpec('zone_id', primary_key=True)))
+    try:
+        validate_sharded([spec], ['missing_model.py'])
+        raise AssertionError('Workers loaded a missing model')
+    except RuntimeError as e:
+        print(e)
+
+
+if __name__ == '__main__':
+    main()
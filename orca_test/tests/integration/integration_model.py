@@ -0,0 +1,51 @@
+# Orca_test
+# Copyright (c) 2016 UrbanSim Inc.
+# See full license in LICENSE
+
+"""
+A small orca model for the informal tests that load a model in another process, such as
+the validation server and the coordinator's workers. If the ORCA_TEST_GENERATION_LOG
+environment variable is set to a path, the name of each table is appended to that file
+when the table is generated.
+
+"""
+
+import os
+
+import numpy as np
+import pandas as pd
+
+import orca
+
+
+def log_generation(table_name):
+    path = os.environ.get('ORCA_TEST_GENERATION_LOG')
+    if path is not None:
+        with open(path, 'a') as f:
+            f.write(table_name + '\n')
+
+
+@orca.table('buildings')
+def buildings():
+    log_generation('buildings')
+    data = {
+        'building_id': np.arange(1, 101),
+        'zone_id': np.arange(100) % 10 + 1,
+        'price': np.arange(100.0),
+        'units': np.arange(100) }
+    df = pd.DataFrame(data).set_index('building_id')
+    df.loc[[6, 96], 'price'] = np.nan
+    df.loc[98, 'units'] = -1
+    return df
+
+@orca.table('zones')
+def zones():
+    log_generation('zones')
+    data = {
+        'zone_id': np.arange(1, 11) }
+    df = pd.DataFrame(data).set_index('zone_id')
+    return df
+
+@orca.column('buildings', 'price_per_unit')
+def price_per_unit(buildings):
+    return buildings.price / (buildings.units + 1)
@@ -7,7 +7,10 @@ This is an informal set of tests for the various assertions.
 
 """
 
-from __future__ import print_function
+import os
+import shutil
+import tempfile
+import warnings
 
 import numpy as np
 import pandas as pd
@@ -26,6 +29,7 @@ def buildings():
         'price1': [10, 0, 50, -1, -1],
         'price2': [10, 0, -1, -1, np.nan],
         'fkey_good': [1, 3, 3, 2, np.nan],
+        'units': [1, 2, 3, 4, 5],
         'fkey_bad': [3, 3, 4, 5, -1] }
     df = pd.DataFrame(data).set_index('building_id')
     return df
@@ -33,7 +37,8 @@ def buildings():
 @orca.table('zones')
 def zones():
     data = {
-        'zone_id': [1, 2, 3] }
+        'zone_id': [1, 2, 3],
+        'max_units': [2, 4, 5] }
     df = pd.DataFrame(data).set_index('zone_id')
     return df
 
@@ -41,6 +46,11 @@ def zones():
 def badtable():
     e = 5 / 0
 
+@orca.column('buildings', 'price1_x2')
+def price1_x2(buildings):
+    # The returned Series is named 'price1'
+    return buildings.price1 * 2
+
 @orca.column('buildings', 'badcol')
 def badcol():
     e = 5 / 0
@@ -62,28 +72,116 @@ spec = OrcaSpec('good_spec',
 
     TableSpec('buildings',
         registered=True,
-        can_be_generated=True),
+        can_be_generated=True,
+        max_memory_mb=1,
+        max_bytes_per_row=200,
+        memory_deep=True,
+        max_generation_seconds=10,
+        max_generation_peak_mb=100,
+        generation_repeat=2),
 
     TableSpec('households', 
         registered=False),
 
     TableSpec('buildings',
-		ColumnSpec('building_id', primary_key=True),
+		ColumnSpec('building_id', primary_key=True, dtype_not_wider_than='int64',
+		           only_grows=True),
+		ColumnSpec('units', max_change_sum=0, max_change_mean=0, max_portion_changed=0,
+		           dtype_not_wider_than='Int64'),
 		ColumnSpec('price1', numeric=True, missing=False, max=50),
 		ColumnSpec('price2', missing_val_coding=np.nan, min=-5),
 		ColumnSpec('price1', missing_val_coding=-1, max_portion_missing=0.5),
-		ColumnSpec('fkey_good', foreign_key='zones.zone_id')),
+		ColumnSpec('price2', missing_val_coding={-1, np.nan}, min=0, max_portion_missing=0.6),
+		ColumnSpec('fkey_good', foreign_key='zones.zone_id'),
+		ColumnSpec('units', group_by='zones.zone_id', group_key='fkey_good',
+		           group_max='zones.max_units'),
+		ColumnSpec('fkey_good', group_by='zones.zone_id', group_key='fkey_good',
+		           group_agg='count', group_min=1),
+		ColumnSpec('strings', pattern='[a-z]', min_length=1, max_length=1, case='lower',
+		           prefix_in=['a', 'b', 'c', 'd', 'e'])),
 		
 	InjectableSpec('dict', has_key='Berkeley'),
-	InjectableSpec('rate', greater_than=0, less_than=1),
+	InjectableSpec('rate', greater_than=0, less_than=1, max_generation_seconds=1),
 	InjectableSpec('bad_inj', registered=True),
 	InjectableSpec('nonexistent', registered=False)
 )
 
 
 ot.assert_orca_spec(spec)
+ot.assert_orca_spec(spec, max_memory='1GB')
+
+# A budget that the next table's characteristics exceed on their own gives a warning
+with warnings.catch_warnings(record=True) as w:
+    warnings.simplefilter('always')
+    ot.assert_orca_spec(OrcaSpec('budget_spec',
+        TableSpec('zones', ColumnSpec('max_units', min=0)),
+        TableSpec('buildings', ColumnSpec('fkey_good', foreign_key='zones.zone_id'))),
+        max_memory='10B')
+    assert any('over the memory budget' in str(x.message) for x in w)
+
+# Tables that orca caches are also counted against the budget, and cleared after use
+calls = []
+
+@orca.table('cached_zones', cache=True)
+def cached_zones():
+    calls.append(1)
+    return pd.DataFrame({'area': np.arange(1000.0)})
+
+with warnings.catch_warnings(record=True) as w:
+    warnings.simplefilter('always')
+    ot.assert_orca_spec(OrcaSpec('cached_spec',
+        TableSpec('cached_zones', ColumnSpec('area', min=0, max=1000))), max_memory='1KB')
+    assert any('over the memory budget' in str(x.message) for x in w)
+orca.get_table('cached_zones')
+assert len(calls) == 2
+
+
+# Assert characteristics from the row group statistics of a Parquet file
+
+parquet_dir = tempfile.mkdtemp()
+parquet_path = os.path.join(parquet_dir, 'buildings.parquet')
+orca.get_table('buildings').local.to_parquet(parquet_path, index=True, row_group_size=2)
+
+ot.assert_orca_spec(OrcaSpec('parquet_spec',
+    TableSpec('buildings',
+		ColumnSpec('price1', missing=False, max=50),
+		ColumnSpec('price1', missing_val_coding=-1, min=0, max_portion_missing=0.5),
+		ColumnSpec('price2', missing_val_coding=np.nan, min=-5, max_portion_missing=0.2),
+		ColumnSpec('price2', missing_val_coding={-1, np.nan}, min=0, max_portion_missing=0.6),
+		ColumnSpec('building_id', min=1, max=5, missing=False),
+		parquet=parquet_path)))
+shutil.rmtree(parquet_dir)
+
+
+
+# Assert changes between iterations, each of which fails on the third check
+
+checks = [
+    lambda: ot.assert_column_max_portion_changed('iterations', 'value', 0.25),
+    lambda: ot.assert_column_max_change('iterations', 'value', 'sum', 0.1),
+    lambda: ot.assert_column_only_grows('iterations', 'ids')]
+
+for index in [None, [30, 10, 20, 40]]:
+    for check in checks:
+        values = [[1, 2, 3, 4], [1, 2, 3, 5], [0, 2, 3, 8]]
+        ids = [[1, 2, 3, 4], [4, 3, 2, 1], [1, 2, 3, 3]]
+        for i in range(3):
+            orca.add_table('iterations', pd.DataFrame({'value': values[i], 'ids': ids[i]},
+                                                      index=index))
+            try:
+                check()
+                assert i < 2
+            except OrcaAssertionError as e:
+                print("OrcaAssertionError: " + str(e))
+                assert i == 2
+        ot.clear_column_summaries()
 
 
+# String characteristics pass for a column whose entries are all missing
+
+orca.add_table('empty_strings', pd.DataFrame({'name': [None, None]}))
+ot.assert_column_strings('empty_strings', 'name', pattern='[a-z]+', min_length=1)
+
 
 # Assertions that should fail
 
@@ -118,3 +216,50 @@ for bs in bad_specs:
         print("OrcaAssertionError: " + str(e))
         pass
 
+# Assertions that must fail
+
+failing_specs = [
+    TableSpec('buildings', ColumnSpec('units', group_by='zones.zone_id',
+                                      group_key='fkey_good', group_max=4)),
+    TableSpec('buildings', ColumnSpec('units', group_by='zones.zone_id',
+                                      group_key='fkey_good', group_agg='mean',
+                                      group_min='zones.max_units')),
+    TableSpec('buildings', ColumnSpec('units', group_by='zones')),
+    TableSpec('buildings', ColumnSpec('strings', pattern='[a-c]')),
+    TableSpec('buildings', ColumnSpec('strings', case='upper')),
+    TableSpec('buildings', ColumnSpec('strings', min_length=2)),
+    TableSpec('buildings', ColumnSpec('price1', max_length=2)),
+    TableSpec('buildings', max_bytes_per_row=8),
+    TableSpec('buildings', ColumnSpec('price1', dtype_not_wider_than='int32')),
+    TableSpec('buildings', ColumnSpec('price1', dtype_not_wider_than='Int16')),
+    TableSpec('buildings', ColumnSpec('price1', dtype_not_wider_than='int9')),
+    TableSpec('buildings', ColumnSpec('price2', missing_val_coding={-1, np.nan}, min=1)),
+    TableSpec('buildings', ColumnSpec('price2', missing_val_coding={-1, 0})),
+]
+
+for i, t_spec in enumerate(failing_specs):
+    try:
+        ot.assert_orca_spec(OrcaSpec('', t_spec))
+        raise AssertionError('Failing spec %d passed' % i)
+    except OrcaAssertionError as e:
+        print("OrcaAssertionError: " + str(e))
+
+
+# Assert a spec against a snapshot of the data, after clearing the orca functions that
+# generated it
+
+snapshot_spec = OrcaSpec('snapshot_spec',
+    TableSpec('buildings',
+		ColumnSpec('price1', max=50),
+		ColumnSpec('price1_x2', max=100, min=-2),
+		ColumnSpec('fkey_good', foreign_key='zones.zone_id'),
+		ColumnSpec('strings', pattern='[a-z]')),
+	InjectableSpec('dict', has_key='Berkeley'),
+	InjectableSpec('rate', greater_than=0, less_than=1))
+
+snapshot_dir = tempfile.mkdtemp()
+ot.write_spec_snapshot(snapshot_spec, snapshot_dir)
+orca.clear_all()
+ot.assert_orca_spec(snapshot_spec, snapshot=snapshot_dir)
+assert orca.table_type('buildings') == 'dataframe'
+shutil.rmtree(snapshot_dir)
@@ -0,0 +1,50 @@
+# Orca_test
+# Copyright (c) 2016 UrbanSim Inc.
+# See full license in LICENSE
+
+"""
+This is an informal test of the pytest plugin. It writes a test module defining a spec,
+runs pytest on it in a subprocess, and checks which items pass and fail.
+
+"""
+
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+
+
+test_module = """
+import numpy as np
+import pandas as pd
+import orca
+from orca_test import OrcaSpec, TableSpec, ColumnSpec
+
+@orca.table('buildings')
+def buildings():
+    return pd.DataFrame({'price': [10, -1, 50, np.nan],
+                         'zone_id': [1, 2, 3, 4]})
+
+spec = OrcaSpec('spec',
+    TableSpec('buildings',
+        ColumnSpec('price', missing_val_coding=-1, min=0, max=100),
+        ColumnSpec('zone_id', min=1, max=3)))
+"""
+
+test_dir = tempfile.mkdtemp()
+with open(os.path.join(test_dir, 'test_specs.py'), 'w') as f:
+    f.write(test_module)
+
+output = subprocess.Popen(
+        [sys.executable, '-m', 'pytest', '-rf', '-p', 'no:cacheprovider', 'test_specs.py'],
+        cwd=test_dir, stdout=subprocess.PIPE, stderr=subprocess.STDOUT).communicate()[0]
+output = output.decode('utf-8')
+shutil.rmtree(test_dir)
+print(output)
+
+# The NaN that isn't coded as -1 only fails the missing_val_coding item, and the other
+# items for the column still ignore the -1 values
+assert 'FAILED test_specs.py::spec::buildings.price[missing_val_coding]' in output
+assert 'FAILED test_specs.py::spec::buildings.zone_id[max]' in output
+assert '2 failed, 3 passed' in output
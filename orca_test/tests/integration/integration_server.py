@@ -0,0 +1,89 @@
+# Orca_test
+# Copyright (c) 2016 UrbanSim Inc.
+# See full license in LICENSE
+
+"""
+This is an informal test of the validation server. It starts 'orca-test serve' on the
+model in integration_model.py in a subprocess, and sends it validation requests.
+
+"""
+
+import json
+import os
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+
+from urllib.error import URLError
+from urllib.request import urlopen
+
+from orca_test.server import serve
+
+
+specs = """
+from orca_test import OrcaSpec, TableSpec, ColumnSpec
+
+spec = OrcaSpec('spec',
+    TableSpec('buildings',
+        ColumnSpec('price', min=0, max=50),
+        ColumnSpec('units', max='many'),
+        ColumnSpec('zone_id', foreign_key='zones.zone_id')))
+"""
+
+spec_dir = tempfile.mkdtemp()
+spec_path = os.path.join(spec_dir, 'specs.py')
+with open(spec_path, 'w') as f:
+    f.write(specs)
+
+# Find a free port
+s = socket.socket()
+s.bind(('127.0.0.1', 0))
+port = s.getsockname()[1]
+s.close()
+
+process = subprocess.Popen(
+        [sys.executable, '-c', 'import sys; from orca_test.server import main; '
+         'main(sys.argv[1:])', 'serve', 'integration_model.py', '--port', str(port)])
+
+
+def post(path, request):
+    url = 'http://127.0.0.1:%d%s' % (port, path)
+    return json.loads(urlopen(url, json.dumps(request).encode('utf-8')).read().decode('utf-8'))
+
+
+try:
+    for i in range(100):
+        try:
+            post('/clear-cache', {})
+            break
+        except URLError:
+            time.sleep(0.1)
+
+    # Errors other than failed assertions are recorded for their own characteristic
+    response = post('/validate', {'spec': spec_path, 'mode': 'all'})
+    print(response)
+    results = dict((r['name'], r) for r in response['results'])
+    assert not response['passed']
+    assert results['buildings.price[min]']['passed']
+    assert 'maximum of 50' in results['buildings.price[max]']['message']
+    assert results['buildings.units[max]']['message'].startswith('TypeError')
+    assert results['buildings.zone_id[foreign_key]']['passed']
+
+    response = post('/validate', {'spec': spec_path, 'tables': ['zones']})
+    assert response == {'passed': True, 'results': []}
+
+finally:
+    process.terminate()
+    process.wait()
+    shutil.rmtree(spec_dir)
+
+
+# The server only binds to loopback addresses
+try:
+    serve([], host='0.0.0.0', port=port)
+    raise AssertionError('Server bound to a non-loopback address')
+except ValueError as e:
+    print(e)
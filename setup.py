@@ -8,16 +8,21 @@ setup(
     author_email='info@urbansim.com',
     url='https://github.com/urbansim/orca_test',
     classifiers=[
-        'Programming Language :: Python :: 2',
-        'Programming Language :: Python :: 2.7',
         'Programming Language :: Python :: 3',
-        'Programming Language :: Python :: 3.5',
         'Programming Language :: Python :: 3.6',
     ],
+    python_requires='>=3.6',
     packages=find_packages(exclude=['*.tests']),
     install_requires=[
         'numpy >= 1.0',
-        'pandas >= 0.12',
+        'pandas >= 1.0',
         'orca >= 1.3.0'
-    ]
+    ],
+    extras_require={
+        'strings': ['pyarrow >= 1.0']
+    },
+    entry_points={
+        'pytest11': ['orca_test = orca_test.pytest_plugin'],
+        'console_scripts': ['orca-test = orca_test.server:main']
+    }
 )